@@ -0,0 +1,293 @@
+import os
+import time
+import tempfile
+import threading
+import http.client
+from io import BytesIO
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date, timedelta
+from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+import constant as C
+
+DAILY_COLS = [
+    'min_temp_f', 'max_temp_f', 'precip_in', 'snow_in',
+    'min_feel', 'max_feel', 'max_wind_speed_kts', 'max_wind_gust_kts',
+    'climo_high_f', 'climo_low_f', 'climo_precip_in', 'day'
+]
+DAILY_START = date(1928, 1, 1)
+# the last few days are refetched since IEM may still be filling them in
+REFRESH_OVERLAP = timedelta(days=3)
+CACHE_TTL = 6 * 60 * 60
+CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+Station = namedtuple(
+    'Station', ['stid', 'name', 'lat', 'lon', 'elev', 'begints', 'network'])
+
+
+def daily_url(station, network, start=None, end=None):
+    start = start or DAILY_START
+    end = end or date.today() + timedelta(days=1)
+    return C.FMTS['daily_asos'].format(
+        station=station, network=network, start=start, end=end)
+
+
+def parse_daily(content):
+    return pd.read_csv(
+        BytesIO(content), index_col='day', usecols=DAILY_COLS,
+        parse_dates=True, na_values='None'
+    )[DAILY_COLS[:-1]]
+
+
+def read_daily(station, network, start=None, end=None):
+    with urlopen(daily_url(station, network, start, end)) as resp:
+        content = resp.read()
+    return parse_daily(content), len(content)
+
+
+class DailyClient(object):
+    """
+    Thread-safe daily.py client for bulk downloads; each thread keeps its
+    own keep-alive connection per host, requests across all threads are
+    spaced to at most `rate` per second, and connection errors, 429s and
+    5xx responses are retried with exponential backoff.
+    """
+
+    def __init__(self, rate=2., retries=3, backoff=1., timeout=120):
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_request = 0.
+
+    def _throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0., self._next_request - now)
+            self._next_request = max(now, self._next_request) + 1 / self.rate
+        time.sleep(wait)
+
+    def _connection(self, scheme, netloc):
+        connections = self._local.__dict__.setdefault('connections', {})
+        con = connections.get((scheme, netloc))
+        if con is None:
+            if scheme == 'https':
+                con = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                con = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            connections[(scheme, netloc)] = con
+        return con
+
+    def _close(self, scheme, netloc):
+        connections = self._local.__dict__.get('connections', {})
+        con = connections.pop((scheme, netloc), None)
+        if con is not None:
+            con.close()
+
+    def get(self, url):
+        parts = urlsplit(url)
+        path = f'{parts.path}?{parts.query}' if parts.query else parts.path
+        for attempt in range(self.retries + 1):
+            self._throttle()
+            try:
+                con = self._connection(parts.scheme, parts.netloc)
+                con.request('GET', path)
+                resp = con.getresponse()
+                content = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._close(parts.scheme, parts.netloc)
+                error = e
+            else:
+                if resp.status == 200:
+                    return content
+                error = HTTPError(url, resp.status, resp.reason,
+                                  resp.headers, None)
+                if resp.status != 429 and resp.status < 500:
+                    raise error
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        raise error
+
+    def read_daily(self, station, network, start=None, end=None):
+        content = self.get(daily_url(station, network, start, end))
+        return parse_daily(content), len(content)
+
+
+class StationCache(object):
+    """
+    On-disk cache of parsed daily ASOS histories, one uncompressed .npz
+    of float64 columns plus an int64 day index per station and network.
+
+    Files are written to a temporary name and atomically renamed, so
+    concurrent `panel serve --num-procs` workers only ever see complete
+    files; eviction tolerates entries removed by another worker.
+    """
+
+    def __init__(self, path, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES,
+                 client=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.read_daily = client.read_daily if client else read_daily
+        # updated from prefetch worker threads
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'fetches': 0, 'refreshes': 0, 'bytes': 0}
+
+    def count(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def filename(self, station, network):
+        return os.path.join(self.path, f'{network}_{station}.npz')
+
+    def load(self, station, network):
+        try:
+            with np.load(self.filename(station, network)) as data:
+                fetched = float(data['fetched'])
+                index = pd.DatetimeIndex(
+                    data['day'].astype('datetime64[D]'), name='day')
+                df = pd.DataFrame({
+                    column: data[column] for column in data['columns']
+                }, index=index)
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None, None
+        return df, fetched
+
+    def _write(self, path, **arrays):
+        # write to a temporary name and rename, so readers never see a
+        # partial file
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.evict()
+
+    def save(self, station, network, df):
+        columns = {column: df[column].values.astype(np.float64)
+                   for column in df.columns}
+        # plain unicode names, since np.load refuses pickled object arrays
+        names = np.array(df.columns, dtype=str)
+        day = df.index.values.astype('datetime64[D]').astype(np.int64)
+        self._write(self.filename(station, network), fetched=time.time(),
+                    columns=names, day=day, **columns)
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith('.npz'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        nbytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if nbytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            nbytes -= size
+
+    def refresh(self, station, network, df):
+        # only request the days after the cached high-water mark, keeping
+        # a short overlap that replaces the possibly incomplete last days
+        start = (df.index.max() - REFRESH_OVERLAP).date()
+        df_new, nbytes = self.read_daily(station, network, start=start)
+        self.count(refreshes=1, bytes=nbytes)
+        df = pd.concat([df.loc[df.index < pd.Timestamp(start)], df_new])
+        return df[~df.index.duplicated(keep='last')]
+
+    def get(self, station, network):
+        df, fetched = self.load(station, network)
+        if df is None or len(df) == 0:
+            df, nbytes = self.read_daily(station, network)
+            self.count(fetches=1, bytes=nbytes)
+            self.save(station, network, df)
+        elif time.time() - fetched > self.ttl:
+            df = self.refresh(station, network, df)
+            self.save(station, network, df)
+        else:
+            self.count(hits=1)
+            # mark as recently used so eviction drops the coldest stations
+            try:
+                os.utime(self.filename(station, network))
+            except FileNotFoundError:
+                pass
+        return df
+
+
+class StationRegistry(object):
+    """
+    Process-wide ASOS station metadata, loaded on first use and shared
+    by every session; stations are looked up by ID in a dict and the
+    sorted IDs double as a prefix index for case-insensitive search.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stations = None
+        self._ids = None
+
+    def _load(self):
+        if self._stations is not None:
+            return self._stations
+        with self._lock:
+            if self._stations is None:
+                df = pd.read_pickle(self.path or C.PATHS['asos'])
+                stations = {}
+                columns = ['stid', 'station_name', 'lat', 'lon', 'elev',
+                           'begints', 'iem_network']
+                for row in df[columns].itertuples(index=False):
+                    stations.setdefault(row[0].upper(), Station(*row))
+                self._ids = sorted(stations)
+                self._stations = stations
+        return self._stations
+
+    @property
+    def ids(self):
+        self._load()
+        return self._ids
+
+    def __len__(self):
+        return len(self._load())
+
+    def __contains__(self, station):
+        return station.upper() in self._load()
+
+    def get(self, station):
+        return self._load().get(station.upper())
+
+    def search(self, prefix, limit=None):
+        ids = self.ids
+        prefix = prefix.upper()
+        start = bisect_left(ids, prefix)
+        stop = start
+        while stop < len(ids) and ids[stop].startswith(prefix):
+            stop += 1
+            if limit is not None and stop - start == limit:
+                break
+        return ids[start:stop]
+
+
+STATION_CACHE = StationCache(C.PATHS['asos_cache'])
+STATIONS = StationRegistry()
@@ -5,7 +5,9 @@ PATHS['base'] = os.path.dirname(os.path.abspath(__file__))
 PATHS['css'] = os.path.join(PATHS['base'], 'theme.css')
 PATHS['data'] = os.path.join(PATHS['base'], 'data')
 PATHS['asos'] = os.path.join(PATHS['data'], 'asos_meta.pkl')
+PATHS['asos_cache'] = os.path.join(PATHS['data'], 'asos_cache')
 PATHS['newborns'] = os.path.join(PATHS['data'], 'newborns.db')
+PATHS['newborns_columns'] = os.path.join(PATHS['data'], 'newborns')
 PATHS['tmp'] = os.path.join(PATHS['data'], 'tmp_ds.npy')
 
 FMTS = {}
@@ -13,10 +15,18 @@ FMTS['daily_asos'] = (
     'https://mesonet.agron.iastate.edu/'
     'cgi-bin/request/daily.py?'
     'network={network}&stations={station}&'
-    'year1=1928&month1=1&day1=1&'
-    'year2=2020&month2=12&day2=1'
+    'year1={start.year}&month1={start.month}&day1={start.day}&'
+    'year2={end.year}&month2={end.month}&day2={end.day}'
 )
 
+# percent male bounds for each Historname gender bucket
+PERCENT_MALE = {
+    'All': (0, 1),
+    'Both': (0.3, 0.7),
+    'Female': (0, 0.3),
+    'Male': (0.7, 1),
+}
+
 CLRS = {
     'light_pink': '#ffd3d4',
     'stale_blue': '#a3b8cd',
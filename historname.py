@@ -1,31 +1,130 @@
-import sqlite3
+import os
+import time
+import random
+import asyncio
+from functools import partial
 
 import param
 import panel as pn
 import pandas as pd
 import hvplot.pandas
 import holoviews as hv
+from bokeh.models import ColumnDataSource, CustomJS, Div
 
 import constant as C
+from newborns import NAME_CACHE, get_pool, get_store
+from util import run_in_executor
 
 QUERY_RANDOM_FMT = '''
-    SELECT name FROM newborns_name_year_gender
-    INNER JOIN newborns_name_max USING(name)
-    WHERE newborns_name_year_gender.percent_male >= ?
-    AND newborns_name_year_gender.percent_male <= ?
-    AND newborns_name_max.max >= ?
-    AND newborns_name_max.max <= ?
+    SELECT name FROM newborns_name
+    WHERE (? == 'All' OR gender == ?)
+    AND max >= ?
+    AND max <= ?
     AND name LIKE ?
     ORDER BY RANDOM() LIMIT 1;
 '''
 
-QUERY_NAME_FMT = '''
+QUERY_SEARCH_FMT = '''
+    SELECT name FROM newborns_name
+    WHERE id IN (
+        SELECT rowid FROM newborns_name_fts
+        WHERE newborns_name_fts.name LIKE ?
+    )
+    AND (? == 'All' OR gender == ?)
+    AND max >= ?
+    AND max <= ?
+    ORDER BY RANDOM() LIMIT 1;
+'''
+
+QUERY_PREFIX_FMT = '''
+    SELECT name FROM newborns_name
+    WHERE name >= ? COLLATE NOCASE
+    AND name < ? COLLATE NOCASE
+    ORDER BY name COLLATE NOCASE LIMIT ?;
+'''
+
+QUERY_NAMES_FMT = '''
     SELECT *
     FROM newborns_name_year_gender
     INNER JOIN newborns_total USING(year)
-    WHERE newborns_name_year_gender.name == ?
+    WHERE newborns_name_year_gender.name IN ({placeholders})
+'''
+
+QUERY_RANKS_FMT = '''
+    SELECT name, year, rank FROM newborns_rank
+    WHERE name IN ({placeholders}) AND gender == ?
+    ORDER BY year;
+'''
+
+QUERY_TOP_FMT = '''
+    SELECT rank, name, count FROM newborns_rank
+    WHERE year == ? AND gender == ?
+    ORDER BY rank LIMIT ?;
+'''
+
+QUERY_SAMPLE_RANGE_FMT = '''
+    SELECT (
+        SELECT id FROM newborns_sample
+        WHERE bucket = ? AND max >= ?
+        ORDER BY max, id LIMIT 1
+    ), (
+        SELECT id FROM newborns_sample
+        WHERE bucket = ? AND max <= ?
+        ORDER BY max DESC, id DESC LIMIT 1
+    );
+'''
+
+QUERY_SAMPLE_FMT = '''
+    SELECT newborns_name.name FROM newborns_sample
+    INNER JOIN newborns_name ON newborns_name.id = newborns_sample.name_id
+    WHERE newborns_sample.bucket = ? AND newborns_sample.id = ?;
+'''
+
+READOUT_FMT = """
+    <center><p>
+    In {year}, there were {total} newborns born
+    in the United States.<br>On public record,
+    {count} ({pct_total}) of these newborns were
+    named {name}; {pct_males} were male while
+    {pct_females} were female.<br>Overall, from 1880 to
+    {year}, there were {cumulative_count} {name}'s;
+    that's {pct_cumulative} of {cumulative_total}
+    newborns since 1880!<br>Download the data
+    <a href="https://catalog.data.gov/dataset/
+    baby-names-from-social-security-card-applications-
+    national-level-data" target="_blank">here</a>!
+    </center></p>
+"""
+
+# the browser keeps the selected name's per-year columns and fills in
+# READOUT_FMT itself, so pointer moves never reach the server
+READOUT_JS = '''
+const data = source.data;
+let i = data.year.indexOf(Math.round(cb_obj.x));
+if (i < 0) {
+    i = 0;
+}
+const count = data.female[i] + data.male[i];
+const fmt = (x) => x.toLocaleString('en-US');
+const pct = (x, n) => (x * 100).toFixed(n) + '%';
+const values = {
+    year: data.year[i],
+    name: name,
+    total: fmt(data.total[i]),
+    count: fmt(count),
+    pct_total: pct(count / data.total[i], 3),
+    pct_males: pct(data.male[i] / count, 1),
+    pct_females: pct(1 - data.male[i] / count, 1),
+    cumulative_count: fmt(data.cumulative_count[i]),
+    cumulative_total: fmt(data.cumulative_total[i]),
+    pct_cumulative: pct(
+        data.cumulative_count[i] / data.cumulative_total[i], 3),
+};
+div.text = template.replace(/{(\w+)}/g, (_, key) => values[key]);
 '''
 
+MAX_NAMES = 20
+
 DF_COLS = ['Name', 'Year', 'Female', 'Male', 'Count',
            'Cumulative Count', 'Percent Male',
            'Total', 'Cumulative Total']
@@ -36,8 +135,8 @@ class Historname(param.Parameterized):
     gender = param.Selector(objects=['All', 'Both', 'Female', 'Male'])
     prange = param.Range(default=(0, 100000), bounds=(0, 100000))
     random = param.Action(label='Random')
+    leaderboard_year = param.Integer(default=2018, bounds=(1880, 2018))
 
-    _stream = hv.streams.PointerX()
     _opts = hv.opts.defaults(
         hv.opts.Area(
             responsive=True,
@@ -64,8 +163,29 @@ class Historname(param.Parameterized):
 
     widgets = param.Parameter()
 
-    def __init__(self):
+    # share built overlays across sessions along with the name frames
+    cache_overlays = True
+
+    # 'client' updates the hover readout in the browser from a payload sent
+    # once per name; 'server' handles PointerX events, deduped per year and
+    # throttled to one render per readout_throttle seconds
+    readout = 'client'
+    readout_throttle = 0.1
+
+    # number of names listed on the leaderboard
+    top_n = 10
+
+    # run queries and frame building on util.EXECUTOR when served
+    offload = True
+
+    def __init__(self, backend=None):
         super().__init__()
+        if backend is None:
+            if os.path.isdir(C.PATHS['newborns_columns']):
+                backend = 'columnar'
+            else:
+                backend = 'sqlite'
+        self.backend = backend
         self.holoviews = pn.pane.HoloViews(
             min_height=500, max_height=800, max_width=1000,
             sizing_mode='stretch_both', align='center')
@@ -75,7 +195,8 @@ class Historname(param.Parameterized):
             parameters=['names'],
             widgets={
                 'names': {'name': '',
-                          'placeholder': ('Enter a name here; '
+                          'placeholder': ('Enter a name, or names '
+                                          'separated by commas, here; '
                                           'wildcards (*) supported!'),
                           'height': 38},
             },
@@ -104,41 +225,229 @@ class Historname(param.Parameterized):
             *self.names_row[1:], self.random_row, *self.prange_row[1:],
             align='center', sizing_mode='stretch_width', max_width=800
         )
+        self.leaderboard_row = pn.Param(
+            self,
+            parameters=['leaderboard_year'],
+            widgets={
+                'leaderboard_year': {'name': 'Leaderboard Year',
+                                     'sizing_mode': 'stretch_width'}
+            }
+        )
+        self.ranks = pn.pane.HoloViews(
+            height=250, sizing_mode='stretch_width')
+        self.leaderboard = pn.pane.DataFrame(
+            index=False, sizing_mode='stretch_width')
         self.markdown = pn.pane.Markdown(sizing_mode='stretch_width')
-        self.random_name(None)
+        self.readout_div = Div(sizing_mode='stretch_width')
+        self._readout_callback = None
+        self._readout_key = None
+        self._readout_time = 0
+        self._readout_pending = None
+        self._stream = hv.streams.PointerX()
+        self._stream.param.watch(self._update_pointer, 'x')
+        self._token = 0
+        self._future = None
+        self.show(self.prepare(self.names, random=True))
+        self.plot_leaderboard()
 
     @staticmethod
     def execute_query(query, inputs):
-        with sqlite3.connect(C.PATHS['newborns']) as con:
-            resp = con.execute(query, inputs)
-        return resp
-
-    def random_name(self, event, names='%'):
-        if self.gender == 'All':
-            percent_male = (0, 1)
-        elif self.gender == 'Male':
-            percent_male = (0.7, 1)
-        elif self.gender == 'Both':
-            percent_male = (0.3, 0.7)
+        return get_pool().execute(query, inputs)
+
+    @staticmethod
+    def query_stats():
+        return get_pool().summary()
+
+    @staticmethod
+    def cache_stats():
+        return NAME_CACHE.summary()
+
+    @classmethod
+    def suggest_names(cls, prefix, limit=10):
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        inputs = (prefix, prefix + '\U0010ffff', limit)
+        return [row[0] for row in cls.execute_query(QUERY_PREFIX_FMT, inputs)]
+
+    def search_name(self, names):
+        # trigram LIKE matches the default case insensitive LIKE, but can
+        # use the index even with a leading wildcard; fall back to a plain
+        # LIKE over the summary table if the index was never built
+        inputs = (self.gender, self.gender, self.prange[0], self.prange[1])
+        if get_pool().fts:
+            resp = self.execute_query(QUERY_SEARCH_FMT, (names, *inputs))
+            return resp.fetchone()
+        resp = self.execute_query(QUERY_RANDOM_FMT, (*inputs, names))
+        return resp.fetchone()
+
+    def sample_name(self):
+        # ids within a bucket are ordered by peak popularity so prange maps
+        # to one contiguous id range; pick uniformly inside it
+        inputs = (self.gender, self.prange[0], self.gender, self.prange[1])
+        id_min, id_max = self.execute_query(
+            QUERY_SAMPLE_RANGE_FMT, inputs).fetchone()
+        if id_min is None or id_max is None or id_min > id_max:
+            return
+        resp = self.execute_query(
+            QUERY_SAMPLE_FMT, (self.gender, random.randint(id_min, id_max)))
+        return resp.fetchone()[0]
+
+    def fetch_name(self, name):
+        return self.fetch_names([name])[name]
+
+    def fetch_names(self, names):
+        frames = {}
+        for name in names:
+            df_names = NAME_CACHE.get(('frame', self.backend, name))
+            if df_names is not None:
+                frames[name] = df_names
+
+        missing = [name for name in names if name not in frames]
+        if missing:
+            # a single query or column pass for every uncached name
+            df_all = self.read_names(missing)
+            for name, df_names in df_all.groupby('Name', sort=False):
+                frames[name] = df_names
+            for name in missing:
+                df_names = frames.setdefault(name, df_all.iloc[:0])
+                nbytes = int(df_names.memory_usage(deep=True).sum())
+                NAME_CACHE.put(('frame', self.backend, name), df_names, nbytes)
+        return frames
+
+    def read_names(self, names):
+        if self.backend == 'columnar':
+            # a single name's columns are views into the mapped files
+            store = get_store()
+            if len(names) == 1:
+                series = store.series(names[0])
+            else:
+                series = store.series_many(names)
+            count = series['female'] + series['male']
+            df_all = pd.DataFrame({
+                'Name': series['name'],
+                'Year': series['year'],
+                'Female': series['female'],
+                'Male': series['male'],
+                'Count': count,
+                'Cumulative Count': series['cumulative_count'],
+                'Percent Male': series['male'] / count,
+                'Total': series['total'],
+                'Cumulative Total': series['cumulative_total'],
+            }, columns=DF_COLS, copy=False).set_index('Year')
         else:
-            percent_male = (0, 0.3)
-
-        if self.names:
-            names = self.names
-        names = names.replace('*', '%').strip()
-        inputs = (percent_male[0], percent_male[1],
-                  self.prange[0], self.prange[1], names)
-        resp = self.execute_query(QUERY_RANDOM_FMT, inputs)
+            query = QUERY_NAMES_FMT.format(
+                placeholders=', '.join('?' * len(names)))
+            resp = self.execute_query(query, names)
+            df_all = pd.DataFrame(resp, columns=DF_COLS).set_index('Year')
+        df_all['Percent Total'] = df_all['Count'] / df_all['Total']
+        df_all['Percent Cumulative'] = (
+            df_all['Cumulative Count'] / df_all['Cumulative Total'])
+        return df_all
+
+    @staticmethod
+    def parse_names(names):
+        names = [name.strip() for name in names.split(',')]
+        return list(dict.fromkeys(name for name in names if name))[:MAX_NAMES]
+
+    def pick_name(self, pattern):
+        pattern = pattern.replace('*', '%').strip()
+        if pattern == '%':
+            return self.sample_name() or 'Unavailable'
+
         try:
-            self.names_sel = resp.fetchone()[0]
+            return self.search_name(pattern)[0]
         except TypeError:
-            self.names_sel = 'Unavailable'
-        self.plot(names=self.names_sel)
+            return 'Unavailable'
 
-    @pn.depends(_stream.param.x)
-    def text(self, year):
+    def prepare(self, names, random=False):
+        # may run on a worker thread, so only read parameters here and
+        # return everything show() needs to update the panes
+        entries = self.parse_names(names)
+        if random and not entries:
+            entries = ['%']
+        if random or '*' in names or '%' in names:
+            # wildcards are resolved per entry, so a comma list can mix
+            # patterns and plain names
+            names = list(dict.fromkeys(
+                self.pick_name(name)
+                if random or '*' in name or '%' in name else name
+                for name in entries))
+        else:
+            names = entries or self.parse_names(self.names_sel)
+
+        frames = self.fetch_names(names)
+        if len(names) > 1:
+            names = [name for name in names if len(frames[name]) > 0]
+            names = names or ['Unavailable']
+            frames.update(self.fetch_names(names[:1]))
+
+        result = {'names': names, 'ranks': self.overlay_ranks(names)}
+        if len(names) > 1:
+            result.update(self.overlay_names(names, frames))
+        else:
+            result['df_names'] = frames[names[0]]
+            result['overlay'] = self.overlay_name(names[0], frames[names[0]])
+            result['html'] = None
+        return result
+
+    def show(self, result):
+        self.names_sel = ', '.join(result['names'])
+        self.df_names = result['df_names']
+        self._readout_key = None
+        overlay = result['overlay']
+        if result['html'] is not None:
+            if self.readout == 'client':
+                self.readout_div.text = result['html']
+            else:
+                self.markdown.object = result['html']
+        else:
+            if self.readout == 'client' and len(self.df_names) > 0:
+                overlay = self.link_readout(overlay)
+            else:
+                # overlays may be shared through NAME_CACHE, so each session
+                # attaches its PointerX stream to its own clone
+                overlay = overlay.clone()
+                self._stream.source = overlay
+            self.render_readout()
+        self.ranks.object = result['ranks']
+        self.holoviews.object = overlay
+
+    def submit(self, names, random=False):
+        self._token += 1
+        if self._future is not None:
+            self._future.cancel()
+
+        doc = pn.state.curdoc
+        if not self.offload or doc is None:
+            self.show(self.prepare(names, random))
+            return
+        doc.add_next_tick_callback(
+            partial(self._submit, names, random, self._token))
+
+    async def _submit(self, names, random, token):
+        if token != self._token:
+            return
+
+        self._future = future = run_in_executor(self.prepare, names, random)
+        try:
+            result = await future
+        except asyncio.CancelledError:
+            return
+        finally:
+            if self._future is future:
+                self._future = None
+
+        # a newer keystroke superseded this request while it ran
+        if token == self._token:
+            self.show(result)
+
+    def random_name(self, event):
+        self.submit(self.names, random=True)
+
+    def render_readout(self, year=None):
         if len(self.df_names) == 0:
-            return self.markdown
+            return
 
         if year is not None:
             year = int(year)
@@ -146,70 +455,164 @@ class Historname(param.Parameterized):
         if year not in self.df_names.index:
             year = self.df_names.index.min()
 
+        if (self.names_sel, year) == self._readout_key:
+            return
+        self._readout_key = (self.names_sel, year)
+        self._readout_time = time.monotonic()
+
         row = self.df_names.loc[year]
-        total = row['Total']
-        count = row['Count']
-        pct_total = row['Percent Total']
-
-        males = row['Male']
-        pct_males = row['Percent Male']
-
-        females = row['Female']
-        pct_females = 1 - row['Percent Male']
-
-        cumulative_total = row['Cumulative Total']
-        cumulative_count = row['Cumulative Count']
-        pct_cumulative = row['Percent Cumulative']
-
-        self.markdown.object = f"""
-            <center><p>
-            In {year}, there were {total:,} newborns born
-            in the United States.<br>On public record,
-            {count:,} ({pct_total:.3%}) of these newborns were
-            named {self.names_sel}; {pct_males:.1%} were male while
-            {pct_females:.1%} were female.<br>Overall, from 1880 to
-            {year}, there were {cumulative_count:,} {self.names_sel}'s;
-            that's {pct_cumulative:.3%} of {cumulative_total:,}
-            newborns since 1880!<br>Download the data
-            <a href="https://catalog.data.gov/dataset/
-            baby-names-from-social-security-card-applications-
-            national-level-data" target="_blank">here</a>!
-            </center></p>
-        """
-        return self.markdown
+        html = READOUT_FMT.format(
+            year=year,
+            name=self.names_sel,
+            total=f"{row['Total']:,}",
+            count=f"{row['Count']:,}",
+            pct_total=f"{row['Percent Total']:.3%}",
+            pct_males=f"{row['Percent Male']:.1%}",
+            pct_females=f"{1 - row['Percent Male']:.1%}",
+            cumulative_count=f"{row['Cumulative Count']:,}",
+            cumulative_total=f"{row['Cumulative Total']:,}",
+            pct_cumulative=f"{row['Percent Cumulative']:.3%}",
+        )
+        if self.readout == 'client':
+            self.readout_div.text = html
+        else:
+            self.markdown.object = html
+
+    def _update_pointer(self, event):
+        year = event.new
+        if year is None or self.readout == 'client':
+            return
+
+        # drop events that stay within the same integer year, and hold
+        # back bursts so only the latest year inside the window renders
+        elapsed = time.monotonic() - self._readout_time
+        doc = pn.state.curdoc
+        if elapsed >= self.readout_throttle or doc is None:
+            self.render_readout(year)
+            return
+
+        if self._readout_pending is None:
+            doc.add_timeout_callback(
+                self._flush_pointer,
+                int((self.readout_throttle - elapsed) * 1000))
+        self._readout_pending = year
+
+    def _flush_pointer(self):
+        year, self._readout_pending = self._readout_pending, None
+        if year is not None:
+            self.render_readout(year)
+
+    def _link_readout(self, plot, element):
+        callbacks = plot.state.js_event_callbacks.get('mousemove', [])
+        if self._readout_callback not in callbacks:
+            plot.state.js_on_event('mousemove', self._readout_callback)
+
+    def link_readout(self, overlay):
+        df_names = self.df_names
+        # int32 keeps the payload small and avoids BigInt arrays in the
+        # browser; even the cumulative totals stay well below 2 ** 31
+        source = ColumnDataSource(data={
+            'year': df_names.index.values.astype('int32'),
+            'female': df_names['Female'].values.astype('int32'),
+            'male': df_names['Male'].values.astype('int32'),
+            'total': df_names['Total'].values.astype('int32'),
+            'cumulative_count': (
+                df_names['Cumulative Count'].values.astype('int32')),
+            'cumulative_total': (
+                df_names['Cumulative Total'].values.astype('int32')),
+        })
+        self._readout_callback = CustomJS(args={
+            'source': source, 'div': self.readout_div,
+            'name': self.names_sel, 'template': READOUT_FMT
+        }, code=READOUT_JS)
+        # overlays may be shared through NAME_CACHE, so hook a clone
+        return overlay.opts(hooks=[self._link_readout], clone=True)
 
     @param.depends('names', watch=True)
-    def plot(self, names=None):
-        if names is None and ('*' in self.names or '%' in self.names):
-            self.random_name(None, names=self.names)
+    def plot(self):
+        self.submit(self.names)
+
+    @property
+    def rank_gender(self):
+        return self.gender if self.gender in ['Female', 'Male'] else 'All'
+
+    def fetch_ranks(self, names):
+        query = QUERY_RANKS_FMT.format(
+            placeholders=', '.join('?' * len(names)))
+        resp = self.execute_query(query, (*names, self.rank_gender))
+        return pd.DataFrame(resp, columns=['Name', 'Year', 'Rank'])
+
+    def overlay_ranks(self, names):
+        df_ranks = self.fetch_ranks(names)
+        if len(df_ranks) == 0:
             return
 
-        resp = self.execute_query(QUERY_NAME_FMT, (self.names_sel,))
-        self.df_names = pd.DataFrame(resp, columns=DF_COLS).set_index('Year')
-        self.df_names['Percent Total'] = (
-            self.df_names['Count'] / self.df_names['Total'])
-        self.df_names['Percent Cumulative'] = (
-            self.df_names['Cumulative Count'] /
-            self.df_names['Cumulative Total']
-        )
+        names = [name for name in names if name in set(df_ranks['Name'])]
+        df_ranks = df_ranks.pivot(index='Year', columns='Name', values='Rank')
+        return df_ranks.hvplot.line(
+            x='Year', y=names, flip_yaxis=True, legend=len(names) > 1
+        ).opts(ylabel=f'{self.rank_gender} Rank', xlabel='', title='',
+               xlim=(1880, 2018), responsive=True)
+
+    @param.depends('gender', watch=True)
+    def plot_ranks(self):
+        # ranks are per gender, so redraw them for the names on show
+        names = self.parse_names(self.names_sel)
+        if names:
+            self.ranks.object = self.overlay_ranks(names)
+
+    @param.depends('leaderboard_year', 'gender', watch=True)
+    def plot_leaderboard(self):
+        inputs = (self.leaderboard_year, self.rank_gender, self.top_n)
+        resp = self.execute_query(QUERY_TOP_FMT, inputs)
+        self.leaderboard.object = pd.DataFrame(
+            resp, columns=['Rank', 'Name', 'Count'])
 
-        if len(self.df_names) > 0:
-            peak = self.df_names['Count'].max()
+    def overlay_names(self, names, frames):
+        df_counts = pd.concat(
+            [frames[name]['Count'] for name in names], axis=1, keys=names
+        ).rename_axis(index='Year', columns='Name')
+        peak = max(df_counts.max().max(), 100)
+        overlay = df_counts.hvplot.line(
+            x='Year', y=names, legend='top_right'
+        ).opts(ylabel='', xlabel='', title='',
+               xlim=(1880, 2018), ylim=(0, peak))
+
+        # the per-year readout is for single names; summarize peaks instead
+        peak_years = df_counts.idxmax()
+        peak_counts = df_counts.max()
+        html = '<center><p>' + '<br>'.join(
+            f'{name} peaked in {peak_years[name]:.0f} with '
+            f'{peak_counts[name]:,.0f} newborns.'
+            for name in names
+        ) + '</p></center>'
+        return {'df_names': df_counts.iloc[:0], 'overlay': overlay,
+                'html': html}
+
+    def overlay_name(self, name, df_names):
+        key = ('overlay', self.backend, name)
+        if self.cache_overlays:
+            overlay = NAME_CACHE.get(key)
+            if overlay is not None:
+                return overlay
+
+        if len(df_names) > 0:
+            peak = df_names['Count'].max()
             if peak < 100:
                 peak = 100
 
             text = hv.Text(
-                1885, peak - peak / 20, self.names_sel,
+                1885, peak - peak / 20, name,
                 halign='left', valign='top', fontsize=35
             )
             color = [C.CLRS['stale_blue'], C.CLRS['light_pink']]
-            area = self.df_names.hvplot.area(
+            area = df_names.hvplot.area(
                 x='Year',
                 y=['Male', 'Female'],
                 color=color,
                 stacked=True
             )
-            line = self.df_names.hvplot.line(
+            line = df_names.hvplot.line(
                 x='Year',
                 y='Count',
                 hover_cols=['Male', 'Female', 'Count']
@@ -218,15 +621,18 @@ class Historname(param.Parameterized):
         else:
             peak = 100
             text = hv.Text(
-                0.5, 0.5, self.names_sel,
+                0.5, 0.5, name,
                 halign='center', valign='center', fontsize=35
             ).opts(xaxis='bare', yaxis='bare')
             overlay = text
 
         overlay = overlay.opts(ylabel='', xlabel='', title='',
                                xlim=(1880, 2018), ylim=(0, peak))
-        self._stream.source = overlay
-        self.holoviews.object = overlay
+        if self.cache_overlays:
+            # the overlay holds its own copies of the frame's columns
+            nbytes = int(df_names.memory_usage(deep=True).sum()) * 2
+            NAME_CACHE.put(key, overlay, nbytes)
+        return overlay
 
     def view(self):
         pink = C.CLRS['light_pink']
@@ -239,7 +645,16 @@ class Historname(param.Parameterized):
             </center>
             ''', sizing_mode='stretch_width', margin=(-10, 10)
         )
+        if self.readout == 'client':
+            readout = pn.pane.Bokeh(self.readout_div)
+        else:
+            readout = self.markdown
+        rankings = pn.Row(
+            self.ranks,
+            pn.Column(*self.leaderboard_row[1:], self.leaderboard,
+                      width=300),
+            sizing_mode='stretch_width', max_width=1000, align='center')
         layout = pn.Column(
-            title, self.widgets, self.holoviews, self.text,
+            title, self.widgets, self.holoviews, readout, rankings,
             sizing_mode='stretch_both')
         return layout
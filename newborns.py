@@ -0,0 +1,184 @@
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+import constant as C
+from util import LRUCache
+
+MMAP_SIZE = 256 * 1024 ** 2
+CACHE_SIZE = -64 * 1024  # negative is in KiB, so 64 MiB per connection
+STATEMENT_CACHE_SIZE = 32
+NAME_CACHE_ENTRIES = 512
+NAME_CACHE_BYTES = 64 * 1024 ** 2
+
+
+class ConnectionPool(object):
+    """
+    Process-wide pool of read-only SQLite connections, one per thread.
+
+    sqlite3 connections cannot be shared across threads by default, so
+    each thread lazily opens its own connection and keeps it for the
+    life of the process; the key includes the pid so forked workers
+    (e.g. `panel serve --num-procs`) never reuse the parent's handle.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._fts = None
+        self.stats = {'hits': 0, 'misses': 0, 'wait': 0., 'connect': 0.}
+
+    def _connect(self):
+        uri = f'{Path(self.path).resolve().as_uri()}?mode=ro&immutable=1'
+        # sqlite3 compiles a statement on first use and keeps it in the
+        # connection's statement cache keyed by its SQL text, so with a
+        # long-lived connection QUERY_*_FMT are each prepared only once
+        con = sqlite3.connect(
+            uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+        con.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        con.execute(f'PRAGMA cache_size = {CACHE_SIZE}')
+        con.execute('PRAGMA query_only = ON')
+        return con
+
+    def connection(self):
+        start = time.perf_counter()
+        key = (os.getpid(), threading.get_ident())
+        with self._lock:
+            con = self._connections.get(key)
+            self.stats['wait'] += time.perf_counter() - start
+            if con is not None:
+                self.stats['hits'] += 1
+                return con
+            self.stats['misses'] += 1
+
+        start = time.perf_counter()
+        con = self._connect()
+        with self._lock:
+            self.stats['connect'] += time.perf_counter() - start
+            self._connections[key] = con
+        return con
+
+    def execute(self, query, inputs=()):
+        return self.connection().execute(query, inputs)
+
+    @property
+    def fts(self):
+        # whether the database has the trigram index and this SQLite can
+        # query it; checked once, so a transient error never disables it
+        if self._fts is None:
+            table = self.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = 'newborns_name_fts'"
+            ).fetchone()
+            try:
+                with sqlite3.connect(':memory:') as con:
+                    con.execute("CREATE VIRTUAL TABLE probe USING "
+                                "fts5(name, tokenize='trigram')")
+                module = True
+            except sqlite3.OperationalError:
+                module = False
+            self._fts = table is not None and module
+        return self._fts
+
+    def close(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for con in connections:
+            con.close()
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['connections'] = len(self._connections)
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / requests if requests else 0.
+        stats['mean_wait'] = stats['wait'] / requests if requests else 0.
+        return stats
+
+
+class ColumnStore(object):
+    """
+    Read-only, memory mapped name-sorted columns written by
+    scripts/preprocess_newborns_db.py.
+
+    A name's rows are a contiguous slice of every column, so fetching
+    its series is a binary search plus views into the mapped files;
+    every worker process shares the same OS page cache.
+    """
+
+    columns = ['year', 'female', 'male', 'cumulative_count']
+
+    def __init__(self, path):
+        self.path = path
+        self.names = self._load('names')
+        self.offsets = self._load('offsets')
+        self.data = {column: self._load(column) for column in self.columns}
+        self.total_year = self._load('total_year')
+        self.total = self._load('total')
+        self.cumulative_total = self._load('cumulative_total')
+
+    def _load(self, key):
+        return np.load(os.path.join(self.path, f'{key}.npy'), mmap_mode='r')
+
+    def locate(self, name):
+        i = self.names.searchsorted(name)
+        if i == len(self.names) or self.names[i] != name:
+            return slice(0, 0)
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def series(self, name):
+        rows = self.locate(name)
+        series = {column: self.data[column][rows] for column in self.columns}
+        series['name'] = np.full(rows.stop - rows.start, name, dtype=object)
+        return self._add_totals(series)
+
+    def series_many(self, names):
+        # one pass over the offsets; unlike series() the slices have to be
+        # concatenated, which copies only the selected rows
+        slices = [self.locate(name) for name in names]
+        series = {
+            column: np.concatenate([self.data[column][rows]
+                                    for rows in slices])
+            for column in self.columns
+        }
+        series['name'] = np.repeat(
+            np.array(names, dtype=object),
+            [rows.stop - rows.start for rows in slices])
+        return self._add_totals(series)
+
+    def _add_totals(self, series):
+        ind = series['year'] - self.total_year[0]
+        series['total'] = self.total[ind]
+        series['cumulative_total'] = self.cumulative_total[ind]
+        return series
+
+
+NAME_CACHE = LRUCache(NAME_CACHE_ENTRIES, NAME_CACHE_BYTES)
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+_STORES = {}
+
+
+def get_pool(path=None):
+    path = path or C.PATHS['newborns']
+    with _POOLS_LOCK:
+        pool = _POOLS.get(path)
+        if pool is None:
+            pool = _POOLS[path] = ConnectionPool(path)
+    return pool
+
+
+def get_store(path=None):
+    path = path or C.PATHS['newborns_columns']
+    with _POOLS_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = ColumnStore(path)
+    return store
@@ -0,0 +1,140 @@
+import zlib
+import argparse
+import threading
+from datetime import date
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    'station', 'day', 'max_temp_f', 'min_temp_f', 'max_dewpoint_f',
+    'min_dewpoint_f', 'precip_in', 'avg_wind_speed_kts', 'avg_wind_drct',
+    'min_rh', 'avg_rh', 'max_rh', 'climo_high_f', 'climo_low_f',
+    'climo_precip_in', 'snow_in', 'snowd_in', 'min_feel', 'avg_feel',
+    'max_feel', 'max_wind_speed_kts', 'max_wind_gust_kts', 'srad_mj'
+]
+FIRST_DAY = date(1948, 1, 1)
+
+
+def synthesize(station, first_day=FIRST_DAY, last_day=None):
+    """
+    Deterministic daily history for a station, shaped like the IEM
+    daily.py CSV: a seasonal temperature cycle plus noise, intermittent
+    precipitation and snow, gusts above sustained wind, and a sprinkle of
+    missing ("None") values.
+    """
+    rng = np.random.default_rng(zlib.crc32(station.encode()))
+    days = pd.date_range(first_day, last_day or date.today())
+    n = len(days)
+    mean = rng.uniform(40, 70)
+    swing = rng.uniform(10, 30)
+    base = mean - swing * np.cos(2 * np.pi * (days.dayofyear.values - 15) /
+                                 365.25)
+    max_temp = np.round(base + 10 + rng.normal(0, 8, n))
+    min_temp = np.round(base - 10 + rng.normal(0, 8, n))
+    precip = np.round(np.where(
+        rng.random(n) < 0.3, rng.exponential(0.3, n), 0), 2)
+    precip[rng.random(n) < 0.05] = 0.0001  # trace
+    wind = np.round(rng.gamma(4, 4, n), 1)
+    df = pd.DataFrame({
+        'station': station,
+        'day': days.strftime('%Y-%m-%d'),
+        'max_temp_f': max_temp,
+        'min_temp_f': min_temp,
+        'max_dewpoint_f': min_temp - 3,
+        'min_dewpoint_f': min_temp - 8,
+        'precip_in': precip,
+        'avg_wind_speed_kts': wind / 2,
+        'avg_wind_drct': rng.integers(0, 360, n),
+        'min_rh': 40,
+        'avg_rh': 60,
+        'max_rh': 90,
+        'climo_high_f': np.round(base + 10, 1),
+        'climo_low_f': np.round(base - 10, 1),
+        'climo_precip_in': 0.1,
+        'snow_in': np.where(max_temp < 35, precip * 10, 0).round(1),
+        'snowd_in': 0,
+        'min_feel': min_temp - 5,
+        'avg_feel': base,
+        'max_feel': max_temp + 2,
+        'max_wind_speed_kts': wind,
+        'max_wind_gust_kts': np.round(wind + rng.gamma(2, 5, n), 1),
+        'srad_mj': 'None',
+    }, columns=COLUMNS)
+    for column in ['max_temp_f', 'min_temp_f', 'precip_in', 'snow_in',
+                   'max_wind_gust_kts']:
+        missing = rng.random(n) < 0.02
+        df[column] = df[column].astype(object)
+        df.loc[missing, column] = 'None'
+    return df
+
+
+class DailyHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real service
+    histories = {}
+    lock = threading.Lock()
+    requests = 0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.endswith('/daily.py'):
+            self.send_error(404)
+            return
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            station = query['stations']
+            start, end = (
+                pd.Timestamp(int(query[f'year{i}']), int(query[f'month{i}']),
+                             int(query[f'day{i}'])) for i in (1, 2))
+        except (KeyError, ValueError):
+            self.send_error(400)
+            return
+
+        with self.lock:
+            type(self).requests += 1
+            df = self.histories.get(station)
+            if df is None:
+                df = self.histories[station] = synthesize(station)
+        # like daily.py, the end date is exclusive
+        day = pd.to_datetime(df['day'])
+        content = df.loc[(day >= start) & (day < end)].to_csv(
+            index=False).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host='127.0.0.1', port=0):
+    """Start the stand-in on a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), DailyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local stand-in for the IEM daily.py CSV service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), DailyHandler)
+    print(f'Serving synthetic daily.py on http://{args.host}:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
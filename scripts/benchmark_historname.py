@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
+
+PATTERNS = ['*ley', '*ann*', 'Mar*', '*a*']
+
+
+def measure(func, args_list, allocations=True):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    # allocations are traced on a separate pass so tracing overhead does not
+    # skew the timings; peak is the largest transient allocation of a call
+    peaks = []
+    if allocations:
+        for args in args_list[:min(len(args_list), 20)]:
+            # restarting clears the peak; reset_peak() needs Python 3.9
+            tracemalloc.start()
+            func(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return np.array(timings) * 1e3, np.array(peaks) / 1024
+
+
+def report(label, timings, peaks):
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    peak = np.median(peaks) if len(peaks) else np.nan
+    print(f'{label:<32} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f} '
+          f'{peak:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Historname name lookup hot path.')
+    parser.add_argument('--db', default=C.PATHS['newborns'])
+    parser.add_argument('--columns', default=C.PATHS['newborns_columns'])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    C.PATHS['newborns'] = args.db
+    C.PATHS['newborns_columns'] = args.columns
+    from historname import Historname
+    from newborns import NAME_CACHE
+
+    random.seed(args.seed)
+    historname = Historname()
+    historname.offload = False
+    names = [row[0] for row in historname.execute_query(
+        'SELECT name FROM newborns_name ORDER BY max DESC LIMIT ?',
+        (args.repeat,))]
+    name_args = [(name,) for name in names]
+    compare_args = [
+        (random.sample(names, min(len(names), 10)),)
+        for _ in range(args.repeat // 10)
+    ]
+
+    print(f'{"benchmark (ms, KiB)":<32} {"p50":>9} {"p95":>9} {"p99":>9} '
+          f'{"peak alloc":>10}')
+    for gender in ['All', 'Both', 'Female', 'Male']:
+        historname.gender = gender
+        report(f'random pick ({gender})',
+               *measure(historname.sample_name, [()] * args.repeat))
+    historname.gender = 'All'
+
+    for pattern in PATTERNS:
+        sql_pattern = pattern.replace('*', '%')
+        report(f'wildcard search ({pattern})', *measure(
+            historname.search_name, [(sql_pattern,)] * args.repeat))
+
+    historname.cache_overlays = False
+    for backend in ['sqlite', 'columnar']:
+        if backend == 'columnar' and not os.path.isdir(args.columns):
+            continue
+        historname.backend = backend
+        report(f'name fetch ({backend})',
+               *measure(historname.read_names, [([name],) for name in names]))
+        report(f'10 name fetch ({backend})',
+               *measure(historname.read_names, compare_args))
+        NAME_CACHE.clear()
+        report(f'frame + overlay ({backend})', *measure(
+            lambda name: historname.overlay_name(
+                name, historname.fetch_name(name)), name_args))
+
+    NAME_CACHE.clear()
+    historname.cache_overlays = True
+    report('prepare, cold cache',
+           *measure(historname.prepare, name_args, allocations=False))
+    report('prepare, warm cache', *measure(historname.prepare, name_args))
+    print(NAME_CACHE.summary())
+    print(historname.query_stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
+
+QUERY_LIKE_FMT = '''
+    SELECT name FROM newborns_name
+    WHERE name LIKE ?;
+'''
+
+QUERY_TRIGRAM_FMT = '''
+    SELECT name FROM newborns_name
+    WHERE id IN (
+        SELECT rowid FROM newborns_name_fts
+        WHERE newborns_name_fts.name LIKE ?
+    );
+'''
+
+QUERY_PREFIX_FMT = '''
+    SELECT name FROM newborns_name
+    WHERE name >= ? COLLATE NOCASE
+    AND name < ? COLLATE NOCASE
+    ORDER BY name COLLATE NOCASE LIMIT 10;
+'''
+
+PATTERNS = {
+    'suffix': ['%ley', '%lyn', '%son'],
+    'infix': ['%ann%', '%ria%', '%del%'],
+    'prefix': ['Mar%', 'Chr%', 'Jos%'],
+}
+
+
+def time_query(con, query, inputs, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = con.execute(query, inputs).fetchall()
+        timings.append(time.perf_counter() - start)
+    return len(rows), timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return statistics.median(timings) * 1e3, p95 * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare LIKE with the trigram index for name search.')
+    parser.add_argument('--db', default=C.PATHS['newborns'])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    con = sqlite3.connect(
+        f'file:{args.db}?mode=ro&immutable=1', uri=True)
+    print(f'{"kind":<8} {"pattern":<8} {"rows":>6} '
+          f'{"like ms":>14} {"trigram ms":>14} {"speedup":>8}')
+    for kind, patterns in PATTERNS.items():
+        for pattern in patterns:
+            rows, like = time_query(
+                con, QUERY_LIKE_FMT, (pattern,), args.repeat)
+            rows_fts, fts = time_query(
+                con, QUERY_TRIGRAM_FMT, (pattern,), args.repeat)
+            assert rows == rows_fts, (pattern, rows, rows_fts)
+            like_med, like_p95 = summarize(like)
+            fts_med, fts_p95 = summarize(fts)
+            print(f'{kind:<8} {pattern:<8} {rows:>6} '
+                  f'{like_med:>6.3f}/{like_p95:<7.3f}'
+                  f'{fts_med:>6.3f}/{fts_p95:<7.3f}'
+                  f'{like_med / fts_med:>8.1f}x')
+
+    print('\nprefix autocomplete (median/p95 ms)')
+    for prefix in ['a', 'ma', 'chr', 'jos', 'zz']:
+        _, timings = time_query(
+            con, QUERY_PREFIX_FMT, (prefix, prefix + '\U0010ffff'),
+            args.repeat)
+        print(f'{prefix:<8} {"%.3f/%.3f" % summarize(timings)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import argparse
+import tracemalloc
+
+import numpy as np
+import panel as pn
+import pandas as pd
+import holoviews as hv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
+from asos import STATION_CACHE, STATIONS  # noqa: E402
+from weatherstats import CalendarIndex  # noqa: E402
+from weatherreport import (  # noqa: E402
+    DF_COLS_BOT, DF_COLS_TOP, prepare_frame)
+hv.extension('bokeh')
+from weatherflash import TAB_CACHE, WINDOWS, WeatherFlash  # noqa: E402
+from report_asos import cached_stations  # noqa: E402
+
+MIB = 1024 ** 2
+
+
+def per_session_frames(station):
+    # what every session held before histories were shared: its own
+    # float64 frame, calendar and record column copy, plus the copied
+    # rows of its selected window
+    meta = STATIONS.get(station)
+    df = prepare_frame(STATION_CACHE.get(meta.stid, meta.network))
+    calendar = CalendarIndex(df.index)
+    columns = [column for column in df.columns
+               if column in DF_COLS_TOP + DF_COLS_BOT]
+    records = df[columns].values.astype(np.float64)[calendar.order]
+    window = df.iloc[calendar.window(df.index.max(), 365)]
+    return df, calendar, records, window
+
+
+def new_session(station, day):
+    session = WeatherFlash()
+    session.read_data(station)
+    session.datetime = session.history.data.index.max() - day
+    session.tabs = [pn.pane.HoloViews() for _ in WINDOWS]
+    return session
+
+
+def per_session(station, day):
+    # the frames above plus a layout of its own for every tab
+    session = new_session(station, day)
+    layouts = [session.create_plots(label) for label in WINDOWS]
+    return per_session_frames(station), layouts
+
+
+def shared_session(station, day):
+    # every tab rendered the way the app does, through the shared
+    # history and TAB_CACHE
+    session = new_session(station, day)
+    for index in range(len(WINDOWS)):
+        session.render_tab(index)
+    return session
+
+
+def measure(open_session, stations, sessions, days):
+    # traced bytes still held once every session is open, so both shared
+    # and per session state are counted exactly once; sessions are spread
+    # over the stations and over their last days
+    TAB_CACHE.clear()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    held = [open_session(stations[i % len(stations)],
+                         pd.Timedelta(days=i // len(stations) % days))
+            for i in range(sessions)]
+    nbytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del held
+    TAB_CACHE.clear()
+    return nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Report WeatherFlash station memory per session for '
+                    'many concurrent sessions.')
+    parser.add_argument('stations', nargs='*',
+                        help='station ids; defaults to cached stations')
+    parser.add_argument('--sessions', type=int, nargs='+',
+                        default=[1, 10, 50, 100])
+    parser.add_argument('--num-stations', type=int, default=5,
+                        help='stations the sessions are spread over')
+    parser.add_argument('--days', type=int, default=5,
+                        help='last days of each station the sessions '
+                             'are spread over')
+    parser.add_argument('--cache', default=C.PATHS['asos_cache'])
+    args = parser.parse_args()
+
+    STATION_CACHE.path = args.cache
+    STATION_CACHE.ttl = float('inf')
+    stations = args.stations or [
+        station for station, _ in cached_stations(args.cache)
+        if station in STATIONS][:args.num_stations]
+    # load each once up front so file reads and imports are not counted
+    for station in stations:
+        per_session(station, pd.Timedelta(0))
+
+    print(f'{len(stations)} stations: {", ".join(stations)}')
+    print(f'{"sessions":>8} {"before MiB":>10} {"after MiB":>10} '
+          f'{"before/session":>15} {"after/session":>14}')
+    for sessions in args.sessions:
+        before = measure(per_session, stations, sessions, args.days)
+        after = measure(shared_session, stations, sessions, args.days)
+        print(f'{sessions:>8} {before / MIB:>10.1f} {after / MIB:>10.1f} '
+              f'{before / sessions / 1024:>12.0f} KiB '
+              f'{after / sessions / 1024:>10.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
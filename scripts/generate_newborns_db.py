@@ -0,0 +1,95 @@
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
+from preprocess_newborns_db import build  # noqa: E402
+
+YEARS = np.arange(1880, 2019)
+SYLLABLES = [
+    'a', 'al', 'an', 'ar', 'ba', 'be', 'bel', 'bri', 'ca', 'cha', 'da',
+    'de', 'den', 'el', 'em', 'en', 'er', 'fa', 'ga', 'gi', 'ha', 'i',
+    'is', 'ja', 'jo', 'ka', 'ke', 'la', 'le', 'ley', 'li', 'lyn', 'ma',
+    'mar', 'me', 'mi', 'na', 'ne', 'ni', 'no', 'o', 'ra', 're', 'ri',
+    'ro', 'sa', 'se', 'son', 'ta', 'te', 'ti', 'to', 'va', 'vi', 'ya',
+]
+# SSA omits any name given to fewer than five newborns of a gender
+MIN_COUNT = 5
+
+
+def make_names(num_names, rng):
+    names = set()
+    while len(names) < num_names:
+        num_syllables = rng.integers(1, 4)
+        name = ''.join(rng.choice(SYLLABLES, num_syllables)).capitalize()
+        if len(name) > 1:
+            names.add(name)
+    return np.array(sorted(names))
+
+
+def generate(out_dir, num_names=20000, births=3500000, zipf=1.1, seed=0):
+    """
+    Write yob*.txt files shaped like the SSA national data: popularity is
+    Zipf distributed over names, each name rises and falls around its own
+    peak year, and most names lean strongly toward one gender.
+    """
+    rng = np.random.default_rng(seed)
+    names = make_names(num_names, rng)
+    weights = 1 / np.arange(1, num_names + 1) ** zipf
+    rng.shuffle(weights)
+
+    peak_year = rng.uniform(YEARS[0] - 20, YEARS[-1] + 20, num_names)
+    spread = rng.uniform(5, 40, num_names)
+    percent_male = np.where(
+        rng.random(num_names) < 0.9,
+        rng.beta(0.3, 0.3, num_names),
+        rng.uniform(0.3, 0.7, num_names))
+
+    # births grow roughly tenfold from 1880 to the late twentieth century
+    totals = births * (0.1 + 0.9 / (1 + np.exp(-(YEARS - 1915) / 12)))
+    for year, total in zip(YEARS, totals):
+        trend = np.exp(-0.5 * ((year - peak_year) / spread) ** 2)
+        probs = weights * (trend + 1e-3)
+        counts = rng.multinomial(int(total), probs / probs.sum())
+        males = rng.binomial(counts, percent_male)
+        females = counts - males
+
+        path = os.path.join(out_dir, f'yob{year}.txt')
+        with open(path, 'w') as f:
+            for gender, gender_counts in (('F', females), ('M', males)):
+                keep = np.flatnonzero(gender_counts >= MIN_COUNT)
+                keep = keep[np.argsort(-gender_counts[keep], kind='stable')]
+                f.writelines(
+                    f'{name},{gender},{count}\n' for name, count in
+                    zip(names[keep], gender_counts[keep]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a deterministic, synthetic newborns.db.')
+    parser.add_argument('--names', type=int, default=20000)
+    parser.add_argument('--births', type=int, default=3500000,
+                        help='peak number of newborns per year')
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--seed', type=int, default=0)
+    # no defaults, since build() replaces whatever is at these paths
+    parser.add_argument('--db', required=True,
+                        help=f'e.g. {C.PATHS["newborns"]} to replace the '
+                             f'real data')
+    parser.add_argument('--columns',
+                        help='defaults to --db without its extension')
+    args = parser.parse_args()
+    columns = args.columns or os.path.splitext(args.db)[0]
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        generate(out_dir, num_names=args.names, births=args.births,
+                 zipf=args.zipf, seed=args.seed)
+        build(out_dir, args.db, columns)
+
+
+if __name__ == '__main__':
+    main()
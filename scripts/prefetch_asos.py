@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import argparse
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
+from asos import CACHE_TTL, DailyClient, StationCache  # noqa: E402
+
+
+def select_stations(df_meta, stations=None, networks=None, states=None,
+                    since=None, limit=None):
+    df = df_meta
+    if stations:
+        df = df.loc[df['stid'].isin(stations)]
+        unknown = sorted(set(stations) - set(df['stid']))
+        if unknown:
+            print(f'Unknown stations: {", ".join(unknown)}',
+                  file=sys.stderr)
+    if networks:
+        df = df.loc[df['iem_network'].isin(networks)]
+    if states:
+        df = df.loc[df['iem_network'].str[:2].isin(states)]
+    if since:
+        begin = pd.to_datetime(df['begints'].str[:10], errors='coerce')
+        df = df.loc[begin.dt.year <= since]
+    df = df.drop_duplicates('stid')
+    if limit:
+        df = df.iloc[:limit]
+    return list(zip(df['stid'], df['iem_network']))
+
+
+def use_base_url(base_url):
+    # point daily.py requests at another host, e.g. the local stand-in
+    # from scripts/asos_stand_in_server.py, keeping the path and query
+    base = urlsplit(base_url)
+    url = urlsplit(C.FMTS['daily_asos'])
+    C.FMTS['daily_asos'] = url._replace(
+        scheme=base.scheme, netloc=base.netloc).geturl()
+
+
+def prefetch(cache, stations, workers=4):
+    results = {'ok': 0, 'failed': []}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(cache.get, station, network): (station, network)
+            for station, network in stations
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            station, network = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                results['failed'].append((station, network, e))
+                print(f'[{i}/{len(futures)}] {network} {station} failed: {e}')
+                continue
+            results['ok'] += 1
+            print(f'[{i}/{len(futures)}] {network} {station}: {len(df)} days')
+    results['elapsed'] = time.perf_counter() - start
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download ASOS daily histories into the station cache.')
+    parser.add_argument('stations', nargs='*',
+                        help='station ids; defaults to every station that '
+                             'matches the metadata filters')
+    parser.add_argument('--network', action='append',
+                        help='IEM network, e.g. IL_ASOS; repeatable')
+    parser.add_argument('--state', action='append',
+                        help='two letter state or country code; repeatable')
+    parser.add_argument('--since', type=int,
+                        help='only stations reporting since this year')
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=2.,
+                        help='maximum requests per second across workers')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=1.,
+                        help='seconds before the first retry, then doubled')
+    parser.add_argument('--cache', default=C.PATHS['asos_cache'])
+    parser.add_argument('--ttl', type=float, default=CACHE_TTL,
+                        help='refresh cached histories older than this '
+                             'many seconds')
+    parser.add_argument('--base-url',
+                        help='fetch from another daily.py host, e.g. '
+                             'http://127.0.0.1:8000')
+    parser.add_argument('--stand-in', action='store_true',
+                        help='start the synthetic stand-in server and '
+                             'fetch from it')
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from asos_stand_in_server import serve
+        host, port = serve().server_address[:2]
+        args.base_url = f'http://{host}:{port}'
+    if args.base_url:
+        use_base_url(args.base_url)
+
+    stations = select_stations(
+        pd.read_pickle(C.PATHS['asos']), stations=args.stations,
+        networks=args.network, states=args.state, since=args.since,
+        limit=args.limit)
+    client = DailyClient(rate=args.rate, retries=args.retries,
+                         backoff=args.backoff)
+    cache = StationCache(args.cache, ttl=args.ttl, client=client)
+    results = prefetch(cache, stations, workers=args.workers)
+
+    stats = cache.stats
+    elapsed = results['elapsed']
+    print(f'Prefetched {results["ok"]}/{len(stations)} stations in '
+          f'{elapsed:.1f}s ({len(stations) / max(elapsed, 1e-9):.2f}/s): '
+          f'{stats["fetches"]} fetched, {stats["refreshes"]} refreshed, '
+          f'{stats["hits"]} fresh, {stats["bytes"] / 1024 ** 2:.1f} MiB')
+    if results['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
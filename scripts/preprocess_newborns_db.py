@@ -1,48 +1,336 @@
 import os
+import sys
 import glob
+import time
+import shutil
 import sqlite3
+import argparse
+import resource
 
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
 
-df = (
-    pd.concat(
-        pd.read_csv(
-            fi, header=None, names=['name', 'gender', 'count']
-        ).assign(year=int(os.path.basename(fi)[3:7]))
-        for fi in glob.glob('data/yob*.txt')
+STATE_COLS = ['female', 'male', 'total', 'max', 'max_year']
+RANK_COLS = {'All': 'count', 'Female': 'female', 'Male': 'male'}
+CHUNK_SIZE = 100000
+
+
+def read_year(path):
+    year = int(os.path.basename(path)[3:7])
+    df = pd.read_csv(
+        path, header=None, names=['name', 'gender', 'count']
     ).pivot_table(
-        'count', ['name', 'year'], 'gender'
-    ).fillna(0).astype(int).reset_index().rename(
-        columns={'M': 'male', 'F': 'female', 'year': 'year', 'name': 'name'}
+        'count', 'name', 'gender', aggfunc='sum'
+    ).reindex(columns=['F', 'M']).fillna(0).astype(int).rename(
+        columns={'F': 'female', 'M': 'male'}
     )
-)
-df.columns.name = ''
-df['count'] = df['female'] + df['male']
-df['cumulative_count'] = (
-    df.reset_index().groupby(['name', 'year'])
-    .sum().groupby(level=0)['count'].cumsum()
-    .reset_index()['count']
-)
-df['percent_male'] = df['male'] / df['count']
-
-df_max = df.groupby('name')['count'].max().rename('max')
-print(df_max.max())
-
-df_total = df.groupby('year')['count'].sum().rename('total').to_frame()
-df_total['cumulative_total'] = df_total.cumsum()
-
-df = df.set_index(['name', 'year'])
-
-with sqlite3.connect('../data/newborns.db') as con:
-    df.to_sql('newborns_name_year_gender', con)
-    df_max.to_sql('newborns_name_max', con)
-    df_total.to_sql('newborns_total', con)
-
-    cursor = con.cursor()
-    queries = ' '.join([
-        'CREATE INDEX name_index ON newborns_name_year_gender (name, year);'
-        'CREATE INDEX name ON newborns_name_max (name);'
-        'CREATE INDEX year ON newborns_total (year);'
+    df.columns.name = ''
+    return year, df
+
+
+def has_state(db):
+    # --append continues from the per-name totals of at least one
+    # ingested year; a missing, empty or half created file has none
+    if not os.path.exists(db):
+        return False
+    con = sqlite3.connect(db)
+    try:
+        tables = {row[0] for row in con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {'newborns_name', 'newborns_total'} <= tables:
+            return False
+        last_year, = con.execute(
+            'SELECT MAX(year) FROM newborns_total').fetchone()
+    finally:
+        con.close()
+    return last_year is not None
+
+
+def load_state(con):
+    # per name running totals are all that's needed to continue from the
+    # last ingested year; no per-year rows are reprocessed
+    df_state = pd.read_sql(
+        'SELECT name, female, male, total, max, max_year '
+        'FROM newborns_name', con, index_col='name')
+    cumulative_total, = con.execute(
+        'SELECT MAX(cumulative_total) FROM newborns_total').fetchone()
+    last_year, = con.execute('SELECT MAX(year) FROM newborns_total').fetchone()
+    return df_state, cumulative_total, last_year
+
+
+def ingest_year(con, year, df, df_state, cumulative_total):
+    df_state = df_state.reindex(
+        df_state.index.union(df.index), fill_value=0)
+    df_prev = df_state.loc[df.index]
+
+    df['count'] = df['female'] + df['male']
+    df['cumulative_count'] = df_prev['total'] + df['count']
+    df['percent_male'] = df['male'] / df['count']
+    df['year'] = year
+    df.rename_axis('name').reset_index()[[
+        'name', 'year', 'female', 'male', 'count', 'cumulative_count',
+        'percent_male']].to_sql(
+        'newborns_name_year_gender', con, if_exists='append', index=False)
+
+    # competition ranks within the year for each gender, so both the top-N
+    # for a year and a name's rank in a year are primary key seeks
+    df_ranks = []
+    for gender, column in RANK_COLS.items():
+        counts = df.loc[df[column] > 0, column]
+        df_ranks.append(pd.DataFrame({
+            'year': year,
+            'gender': gender,
+            'rank': counts.rank(method='min', ascending=False).astype(int),
+            'name': counts.index,
+            'count': counts,
+        }))
+    pd.concat(df_ranks).to_sql(
+        'newborns_rank', con, if_exists='append', index=False)
+
+    # strictly greater keeps the first year a name reached its peak
+    peak = df['count'] > df_prev['max']
+    df_state.loc[df.index, 'female'] += df['female']
+    df_state.loc[df.index, 'male'] += df['male']
+    df_state.loc[df.index, 'total'] = df['cumulative_count']
+    df_state.loc[peak.index[peak], 'max'] = df.loc[peak, 'count']
+    df_state.loc[peak.index[peak], 'max_year'] = year
+
+    total = int(df['count'].sum())
+    cumulative_total += total
+    con.execute(
+        'INSERT INTO newborns_total (year, total, cumulative_total) '
+        'VALUES (?, ?, ?)', (year, total, cumulative_total))
+    return df_state, cumulative_total
+
+
+def write_names(con, df_state):
+    # one summary row per name over its lifetime; the gender bucket is based
+    # on the lifetime percent male so each name belongs to exactly one of
+    # Female/Both/Male, with the bucket bounds closed on the Both side
+    df_name = df_state.rename_axis('name').reset_index()
+    df_name['percent_male'] = df_name['male'] / df_name['total']
+    df_name['gender'] = np.select([
+        df_name['percent_male'] < C.PERCENT_MALE['Both'][0],
+        df_name['percent_male'] <= C.PERCENT_MALE['Both'][1]
+    ], ['Female', 'Both'], 'Male')
+
+    # dense name ids ordered by peak popularity; each gender bucket gets its
+    # own contiguous id range over the same ordering so the app can binary
+    # search prange and then sample uniformly with a single indexed lookup
+    df_name = df_name.sort_values(['max', 'name'])
+    df_name.index = pd.RangeIndex(len(df_name), name='id')
+    df_sample = pd.concat([
+        df_name.loc[
+            (bucket == 'All') | (df_name['gender'] == bucket)
+        ].reset_index().rename(columns={'id': 'name_id'}).assign(
+            bucket=bucket)
+        for bucket in C.PERCENT_MALE
     ])
-    cursor.executescript(queries)
+    df_sample['id'] = df_sample.groupby('bucket').cumcount()
+
+    con.executescript('''
+        DROP TABLE IF EXISTS newborns_name_max;
+        DROP TABLE IF EXISTS newborns_name;
+        DROP TABLE IF EXISTS newborns_sample;
+        DROP TABLE IF EXISTS newborns_name_fts;
+    ''')
+    df_name.set_index('name')['max'].to_sql('newborns_name_max', con)
+    con.execute('''
+        CREATE TABLE newborns_name (
+            id INTEGER PRIMARY KEY, name TEXT, gender TEXT,
+            percent_male REAL, max INTEGER, max_year INTEGER,
+            total INTEGER, female INTEGER, male INTEGER)
+    ''')
+    con.executemany(
+        'INSERT INTO newborns_name VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        df_name[[
+            'name', 'gender', 'percent_male', 'max', 'max_year', 'total',
+            'female', 'male'
+        ]].itertuples(name=None))
+    con.execute('''
+        CREATE TABLE newborns_sample (
+            bucket TEXT, id INTEGER, name_id INTEGER, max INTEGER,
+            PRIMARY KEY (bucket, id)) WITHOUT ROWID
+    ''')
+    con.executemany(
+        'INSERT INTO newborns_sample VALUES (?, ?, ?, ?)',
+        df_sample[['bucket', 'id', 'name_id', 'max']].itertuples(
+            index=False, name=None))
+
+    con.executescript('''
+        CREATE INDEX name ON newborns_name_max (name);
+        CREATE INDEX sample_max ON newborns_sample (bucket, max);
+        CREATE INDEX name_summary ON newborns_name (name, max, gender);
+        CREATE INDEX max_summary ON newborns_name (max, name);
+        CREATE INDEX gender_summary ON newborns_name (gender, max, name);
+        CREATE INDEX name_nocase ON newborns_name (name COLLATE NOCASE);
+    ''')
+
+    # trigram index for wildcard search, including leading wildcards
+    try:
+        con.executescript('''
+            CREATE VIRTUAL TABLE newborns_name_fts USING fts5(
+                name, content='newborns_name', content_rowid='id',
+                tokenize='trigram');
+            INSERT INTO newborns_name_fts(newborns_name_fts)
+            VALUES('rebuild');
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f'Skipping trigram index, SQLite {sqlite3.sqlite_version} '
+              f'lacks FTS5 trigram support: {e}')
+
+
+def write_columns(con, columns_dir):
+    # name sorted columns for the memory mapped backend; a name's series is
+    # names.searchsorted(name) -> offsets[i]:offsets[i + 1] in every column;
+    # rows are streamed out of the (name, year) index in bounded chunks
+    num_rows, = con.execute(
+        'SELECT COUNT(*) FROM newborns_name_year_gender').fetchone()
+    columns = {
+        'year': np.empty(num_rows, np.int16),
+        'female': np.empty(num_rows, np.int32),
+        'male': np.empty(num_rows, np.int32),
+        'cumulative_count': np.empty(num_rows, np.int64),
+    }
+    names = []
+    offsets = []
+    cursor = con.execute('''
+        SELECT name, year, female, male, cumulative_count
+        FROM newborns_name_year_gender ORDER BY name, year
+    ''')
+    start = 0
+    while True:
+        rows = cursor.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        chunk_names, *chunk_columns = zip(*rows)
+        stop = start + len(rows)
+        for key, values in zip(columns, chunk_columns):
+            columns[key][start:stop] = values
+        chunk_names = np.array(chunk_names, dtype=object)
+        new = np.flatnonzero(chunk_names[1:] != chunk_names[:-1]) + 1
+        if not names or chunk_names[0] != names[-1]:
+            new = np.concatenate([[0], new])
+        names.extend(chunk_names[new])
+        offsets.extend(new + start)
+        start = stop
+
+    df_total = pd.read_sql(
+        'SELECT year, total, cumulative_total FROM newborns_total '
+        'ORDER BY year', con)
+    columns.update({
+        'names': np.array(names, dtype=str),
+        'offsets': np.array(offsets + [num_rows], dtype=np.int64),
+        'total_year': df_total['year'].values.astype(np.int16),
+        'total': df_total['total'].values,
+        'cumulative_total': df_total['cumulative_total'].values,
+    })
+    # running apps keep the current files memory mapped, so the new set is
+    # written aside and swapped in; the old inodes live on until unmapped
+    columns_dir = os.path.normpath(columns_dir)
+    tmp_dir = columns_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for key, values in columns.items():
+        np.save(os.path.join(tmp_dir, f'{key}.npy'), values)
+    if os.path.exists(columns_dir):
+        old_dir = columns_dir + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(columns_dir, old_dir)
+        os.replace(tmp_dir, columns_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(tmp_dir, columns_dir)
+
+
+def build(data_dir, db, columns_dir, append=False):
+    start = time.perf_counter()
+    paths = sorted(glob.glob(os.path.join(data_dir, 'yob*.txt')))
+    if append and not has_state(db):
+        print(f'No ingested years in {db} to append to, building it '
+              f'from scratch')
+        append = False
+    # the app opens the db with immutable=1, so it is never written in
+    # place; a copy is built or appended to and then swapped in
+    tmp_db = db + '.tmp'
+    if os.path.exists(tmp_db):
+        os.remove(tmp_db)
+    if append:
+        shutil.copyfile(db, tmp_db)
+
+    con = sqlite3.connect(tmp_db)
+    with con:
+        if append:
+            df_state, cumulative_total, last_year = load_state(con)
+            paths = [path for path in paths
+                     if int(os.path.basename(path)[3:7]) > last_year]
+        else:
+            # a fresh file can simply be deleted and rebuilt if interrupted
+            df_state = pd.DataFrame(columns=STATE_COLS, dtype=int)
+            cumulative_total = 0
+            con.executescript('''
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE newborns_total (
+                    year INTEGER, total INTEGER, cumulative_total INTEGER);
+                CREATE INDEX year ON newborns_total (year);
+            ''')
+
+        # the per-year rows are written without an index; older builds also
+        # carry a duplicate of name_index that to_sql created
+        con.executescript('''
+            DROP INDEX IF EXISTS ix_newborns_name_year_gender_name_year;
+            CREATE TABLE IF NOT EXISTS newborns_name_year_gender (
+                name TEXT, year INTEGER, female INTEGER, male INTEGER,
+                count INTEGER, cumulative_count INTEGER, percent_male REAL);
+            CREATE TABLE IF NOT EXISTS newborns_rank (
+                year INTEGER, gender TEXT, rank INTEGER, name TEXT,
+                count INTEGER,
+                PRIMARY KEY (year, gender, rank, name)) WITHOUT ROWID;
+        ''')
+        for path in paths:
+            year, df = read_year(path)
+            df_state, cumulative_total = ingest_year(
+                con, year, df, df_state, cumulative_total)
+            print(f'Ingested {year}: {len(df)} names')
+
+        # indexing once after the bulk insert is far cheaper than keeping
+        # the name ordered indexes up to date row by row
+        con.executescript('''
+            CREATE INDEX IF NOT EXISTS name_index
+            ON newborns_name_year_gender (name, year);
+            CREATE INDEX IF NOT EXISTS rank_name
+            ON newborns_rank (name, gender, year, rank);
+        ''')
+        if paths:
+            write_names(con, df_state)
+            write_columns(con, columns_dir)
+    con.close()
+    os.replace(tmp_db, db)
+
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'Ingested {len(paths)} years in {elapsed:.1f}s '
+          f'using {peak:.1f} MiB peak memory')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build newborns.db one yob*.txt file at a time.')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--db', default=os.path.join('..', 'data',
+                                                     'newborns.db'))
+    parser.add_argument('--columns', default=os.path.join('..', 'data',
+                                                          'newborns'))
+    parser.add_argument(
+        '--append', action='store_true',
+        help='only ingest years newer than the ones already in --db')
+    args = parser.parse_args()
+    build(args.data_dir, args.db, args.columns, append=args.append)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import csv
+import time
+import argparse
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import constant as C  # noqa: E402
+from asos import STATION_CACHE  # noqa: E402
+from weatherreport import Highlight, station_highlights  # noqa: E402
+from prefetch_asos import select_stations  # noqa: E402
+
+FIELDS = ['station', 'network', 'day'] + list(Highlight._fields)
+
+
+def cached_stations(path):
+    # (station, network) of every history in the cache, skipping the
+    # <network>_<station>.climo.npz files older versions stored beside them
+    if not os.path.isdir(path):
+        return []
+    stations = []
+    for name in sorted(os.listdir(path)):
+        stem, ext = os.path.splitext(name)
+        if ext != '.npz' or '.' in stem:
+            continue
+        network, station = stem.rsplit('_', 1)
+        stations.append((station, network))
+    return stations
+
+
+def init_worker(cache):
+    STATION_CACHE.path = cache
+
+
+def report_station(task):
+    station, network, day = task
+    try:
+        day, highlights = station_highlights(station, day)
+    except Exception as e:
+        return station, network, day, None, e
+    return station, network, day, highlights, None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Report notable weather for many cached ASOS stations.')
+    parser.add_argument('stations', nargs='*',
+                        help='station ids; defaults to every cached station')
+    parser.add_argument('--network', action='append',
+                        help='IEM network, e.g. IL_ASOS; repeatable')
+    parser.add_argument('--state', action='append',
+                        help='two letter state or country code; repeatable')
+    parser.add_argument('--date', type=pd.Timestamp,
+                        default=pd.Timestamp(date.today() - timedelta(days=1)),
+                        help='day to report, yesterday by default')
+    parser.add_argument('--last', action='store_true',
+                        help="report each station's last cached day instead")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunksize', type=int, default=8)
+    parser.add_argument('--cache', default=C.PATHS['asos_cache'])
+    parser.add_argument('--out', help='CSV path, stdout by default')
+    args = parser.parse_args()
+
+    if args.stations or args.network or args.state:
+        stations = select_stations(
+            pd.read_pickle(C.PATHS['asos']), stations=args.stations,
+            networks=args.network, states=args.state)
+    else:
+        stations = cached_stations(args.cache)
+        if not stations:
+            parser.error(f'no cached stations in {args.cache}; run '
+                         f'scripts/prefetch_asos.py or list stations')
+    tasks = [(station, network, None if args.last else args.date)
+             for station, network in stations]
+
+    out = open(args.out, 'w', newline='') if args.out else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    notable = failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers,
+                             initializer=init_worker,
+                             initargs=(args.cache,)) as executor:
+        for station, network, day, highlights, error in executor.map(
+                report_station, tasks, chunksize=args.chunksize):
+            if error is not None:
+                failed += 1
+                print(f'{network} {station} failed: {error}', file=sys.stderr)
+                continue
+            notable += bool(highlights)
+            for highlight in highlights:
+                writer.writerow({
+                    'station': station,
+                    'network': network,
+                    'day': f'{day:%Y-%m-%d}',
+                    **highlight._asdict(),
+                })
+    elapsed = time.perf_counter() - start
+    if args.out:
+        out.close()
+    print(f'Reported {len(tasks)} stations in {elapsed:.1f}s '
+          f'({len(tasks) / max(elapsed, 1e-9):.1f} stations/s): '
+          f'{notable} with highlights, {failed} failed', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from weatherstats import RecordIndex, StationData  # noqa: E402
+
+TOP = ['high', 'gust']
+BOTTOM = ['low']
+
+
+@pytest.fixture
+def df():
+    # coarse values so each calendar day has many ties, plus NaNs,
+    # including a leap day and days where a column is missing entirely
+    rng = np.random.default_rng(0)
+    index = pd.date_range('1990-01-01', '2020-12-31', name='day')
+    values = rng.integers(0, 6, size=(len(index), 3)).astype(np.float64)
+    values[rng.random(values.shape) < 0.15] = np.nan
+    df = pd.DataFrame(values, index=index, columns=['high', 'low', 'gust'])
+    df['gust'] /= 4
+    return df
+
+
+def expected_records(df, day):
+    # same calendar day up to and including day, ranked by pandas
+    same_day = df.loc[(df.index.month == day.month) &
+                      (df.index.day == day.day) & (df.index <= day)]
+    ranks = same_day.rank(method='max', na_option='bottom', ascending=False)
+    num_days = len(same_day)
+    prev_recs = {}
+    for column in TOP + BOTTOM:
+        second_rank = 2 if column in TOP else num_days - 1
+        dates = ranks.index[ranks[column] == second_rank]
+        if len(dates):
+            prev_recs[column] = (dates[-1], same_day.loc[dates[-1], column])
+    return ranks.loc[day], num_days, prev_recs
+
+
+def assert_records_match(record_index, df, day):
+    row_rec, num_days, prev_recs = record_index.records(day, TOP, BOTTOM)
+    expected_rec, expected_days, expected_prev = expected_records(df, day)
+
+    assert num_days == expected_days
+    np.testing.assert_array_equal(
+        row_rec.values, expected_rec[record_index.columns].values)
+    assert prev_recs.keys() == expected_prev.keys()
+    for column, (date, value) in expected_prev.items():
+        assert prev_recs[column][0] == date
+        # with two or fewer days the runner-up may be a missing value
+        np.testing.assert_equal(prev_recs[column][1], value)
+
+
+@pytest.mark.parametrize('day', [
+    '1990-01-01', '1990-03-15', '1996-02-29', '2004-02-29', '2005-07-04',
+    '2012-12-31', '2020-02-29', '2020-06-30', '2020-12-31',
+])
+def test_records_match_pandas_rank(df, day):
+    record_index = RecordIndex(StationData(df), TOP + BOTTOM)
+    assert_records_match(record_index, df, pd.Timestamp(day))
+
+
+def test_records_match_pandas_rank_every_day(df):
+    record_index = RecordIndex(StationData(df), TOP + BOTTOM)
+    for day in df.index[-366:]:
+        assert_records_match(record_index, df, day)
+
+
+def test_ties_and_nans():
+    index = pd.DatetimeIndex(
+        [f'{year}-05-01' for year in range(2000, 2007)], name='day')
+    df = pd.DataFrame({
+        'high': [3, 5, np.nan, 5, 1, np.nan, 5],
+        'low': [2, np.nan, 2, 0, 0, 4, np.nan],
+        'gust': [np.nan] * 7,
+    }, index=index)
+    record_index = RecordIndex(StationData(df), TOP + BOTTOM)
+    assert_records_match(record_index, df, index[-1])
+
+    row_rec, num_days, prev_recs = record_index.records(
+        index[-1], TOP, BOTTOM)
+    assert num_days == 7
+    # three tied 5s all rank 3, so the highs have no runner-up, the NaN
+    # low ties at the bottom and every missing gust ranks last
+    assert row_rec['high'] == 3
+    assert row_rec['low'] == 7
+    assert row_rec['gust'] == 7
+    assert 'high' not in prev_recs
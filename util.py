@@ -1,5 +1,77 @@
+import asyncio
+import threading
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import constant as C
 
+# shared by every session in the process so blocking work is bounded
+EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
 def remove_white_borders(plot, element):
     p = plot.state
     p.border_fill_color = C.CLRS['white_smoke']
+
+
+def run_in_executor(func, *args, **kwargs):
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(EXECUTOR, partial(func, *args, **kwargs))
+
+
+class LRUCache(object):
+    """
+    Thread-safe least recently used cache bounded by both the number of
+    entries and their approximate size in bytes.
+
+    Cached values are shared by every session in the process, so callers
+    must treat them as read-only.
+    """
+
+    def __init__(self, max_entries, max_bytes=float('inf')):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.stats['misses'] += 1
+                return
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value, nbytes=0):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while (len(self._entries) > self.max_entries or
+                   self.nbytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['nbytes'] = self.nbytes
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / requests if requests else 0.
+        return stats
@@ -1,4 +1,10 @@
+import html
+import time
+import asyncio
+import logging
 from datetime import datetime
+from functools import partial
+from collections import OrderedDict
 
 import numpy as np
 import panel as pn
@@ -6,6 +12,10 @@ import pandas as pd
 import holoviews as hv
 
 import constant as C
+from asos import STATIONS
+from util import LRUCache, run_in_executor
+from weatherstats import histograms
+from weatherreport import HISTORIES, parse_field_units
 
 
 SUBTITLE = (
@@ -21,27 +31,19 @@ SUBTITLE = (
     f'<a href="https://weatherspark.com/" '
     f'target=_blank">Weather Spark</a>.</center>'
 )
-DF_COLS_ALL = [
-    'min_temp_f', 'max_temp_f', 'precip_in', 'snow_in',
-    'min_feel', 'max_feel', 'max_wind_speed_kts', 'max_wind_gust_kts',
-    'climo_high_f', 'climo_low_f', 'climo_precip_in', 'day'
-]
-DF_COLS_POSITIVE = ['Precip In', 'Snow In']
-DF_COLS_RENAMES = {
-    'Climo High F': 'Climo Max Temp F',
-    'Climo Low F': 'Climo Min Temp F',
-    'Min Feel': 'Min Feel F',
-    'Max Feel': 'Max Feel F',
-    'Max Wind Speed Kts': 'Max Wind Kts',
-    'Max Wind Gust Kts': 'Max Gust Kts'
+WINDOWS = {
+    'Past Years': None,
+    'Past 365 Days': 365,
+    'Past 90 Days': 90,
+    'Past 30 Days': 30,
+    'Past 14 Days': 14,
 }
-DF_COLS_TMP = ['Min Temp F', 'Max Temp F', 'Min Feel F', 'Max Feel F']
-DF_COLS_PCP = ['Precip In']
-DF_COLS_WND = ['Max Wind Kts', 'Max Gust Kts']
-DF_COLS_TOP = ['Max Temp F', 'Max Feel F',
-               'Precip In', 'Snow In',
-               'Max Wind Kts', 'Max Gust Kts']
-DF_COLS_BOT = ['Min Temp F', 'Min Feel F']
+TAB_CACHE_ENTRIES = 50
+
+# rendered tab layouts shared by every session in the process
+TAB_CACHE = LRUCache(TAB_CACHE_ENTRIES)
+
+logger = logging.getLogger(__name__)
 
 
 class WeatherFlash():
@@ -59,104 +61,42 @@ class WeatherFlash():
                      text_font='calibri', **tools_kwds),
         backend='bokeh'
     )
+    # render the remaining tabs on later event loop ticks after the
+    # visible one is shown, instead of only when they are opened
+    prefetch_tabs = True
+    # run station and date updates on the shared worker pool so other
+    # sessions keep responding while a slow station loads
+    offload = True
 
     def __init__(self):
-        self.df_meta = pd.read_pickle(C.PATHS['asos'])
-        self.stations = list(self.df_meta['stid'])
-        self.stations += [station.lower() for station in self.stations]
+        self._token = 0
+        self._future = None
+        self._pending_station = None
 
     def read_data(self, station):
-        station = station.upper()
-        _, self.name, _, _, _, self.ts, network = self.df_meta.loc[
-            self.df_meta['stid'] == station].values[0]
-
-        df = pd.read_csv(
-            C.FMTS['daily_asos'].format(station=station, network=network),
-            index_col='day', usecols=DF_COLS_ALL, parse_dates=True,
-            na_values='None'
-        )[DF_COLS_ALL[:-1]]
-        df['day_of_year'] = df.index.dayofyear
-        df.columns = df.columns.str.replace('_', ' ').str.title()
-        df = df.rename(columns=DF_COLS_RENAMES)
-        for col in DF_COLS_POSITIVE:
-            df.loc[df[col] < 0, col] = np.nan
-        self.df = df.dropna(subset=[df.columns[0]])
-
-    @staticmethod
-    def order_of_mag(x):
-        if x == 0:
-            return 0
-        else:
-            return np.floor(np.log10(np.abs(x)))
-
-    def roundn(self, x, base=None, method='up'):
-        if method == 'up':
-            return np.ceil(x / base) * base
-        elif method == 'down':
-            return np.floor(x / base) * base
-        else:
-            return np.round(x / base) * base
-
-    def parse_field_units(self, var, lower=False):
-        split = var.split()
-        units = split.pop(-1)
-        units = units.upper() if len(units) == 1 else f' {units.lower()}'
-        field = ' '.join(split).lower() if lower else ' '.join(split)
-        return field, units
-
-    def create_hist(self, df_sel, var):
-        # keep histogram pairs consistent with the same xlim + ylim
-        # since the pairs are likely to be min + max or somehow related
-        # for more intuitive comparison between the pairs
-        col_ind = list(df_sel.columns).index(var)
-        if col_ind % 2 == 0:
-            var_ref = df_sel.columns[col_ind + 1]
-        else:
-            var_ref = df_sel.columns[col_ind - 1]
-
+        # the station's history is shared with every other session showing
+        # it; a session only keeps the reference and its selected date
+        self.history = HISTORIES.get(station)
+
+    def create_hist(self, hists, col_ind, var):
+        # hists holds every variable's bins, counts and climatology for the
+        # selected days, see weatherstats.histograms; pairs share the same
+        # xlim + ylim since they are likely to be min + max or somehow
+        # related for more intuitive comparison between the pairs
         if col_ind < 4:
             ylabel = 'Number of Days'
         else:
             ylabel = ''
 
-        var_min = df_sel[[var, var_ref]].min().min()
-        var_max = df_sel[[var, var_ref]].max().max()
-
-        oom = self.order_of_mag(var_max) - 1
-        scale = 10 ** oom
-        if oom > 0:
-            scale = np.log10(scale)
-        base = scale * 5
-
-        var_min = self.roundn(var_min, base=base, method='down')
-        var_max = self.roundn(var_max, base=base)
-
-        if var_max < 1:
-            var_max = 1
-
-        num_bins = (var_max - var_min) / base
-        if num_bins <= 7:
-            step = base / 3
-        elif num_bins <= 14:
-            step = base / 2
-        else:
-            step = base
-
-        var_bins = np.arange(var_min, var_max + step, step).tolist()
-
-        if var_max == var_min:
-            var_max += 0.01
-        xlim = var_min - base / 3, var_max + base / 3
+        num_bins = hists['num_bins'][col_ind]
+        var_edge = hists['edges'][col_ind, :num_bins + 1]
+        var_freq = hists['counts'][col_ind, :num_bins]
+        xlim = tuple(hists['xlim'][col_ind])
         xmid = (xlim[0] + xlim[1]) / 2
-
-        var_freq, var_edge = np.histogram(
-            df_sel[var].values, bins=var_bins)
-        var_ref_freq, _ = np.histogram(
-            df_sel[var_ref].values, bins=var_bins)
-        ymax = max(var_freq.max(), var_ref_freq.max())
+        ymax = hists['ymax'][col_ind]
         ylim = (0, ymax + ymax / 4)
 
-        var_field, var_units = self.parse_field_units(var)
+        var_field, var_units = parse_field_units(var)
         var_fmt = '.2f' if var not in ['Precip In', 'Snow In'] else '.2f'
 
         var_hist = hv.Histogram((var_edge, var_freq)).opts(
@@ -165,16 +105,14 @@ class WeatherFlash():
 
         plot = var_hist
         # highlight selected date
-        var_sel = df_sel.loc[self.datetime.strftime('%Y-%m-%d'), var]
-        if np.isnan(var_sel):
+        var_ind = hists['selected'][col_ind]
+        if var_ind < 0:
             label = var
         else:
-            var_ind = np.where(var_edge <= var_sel)[0][-1]
-            if var_ind == len(var_edge) - 1:
-                var_ind -= 1
-            var_slice = slice(*var_edge[var_ind:var_ind + 2])
-            var_hist_hlgt = var_hist[var_slice, :].opts(
-                fill_color=C.CLRS["red"])
+            var_sel = hists['value'][col_ind]
+            var_hist_hlgt = var_hist.clone(
+                (var_edge[var_ind:var_ind + 2], var_freq[var_ind:var_ind + 1])
+            ).opts(fill_color=C.CLRS["red"])
             label = f'{var_field}: {var_sel:{var_fmt}} {var_units}'
             plot *= var_hist_hlgt
 
@@ -186,39 +124,12 @@ class WeatherFlash():
             plot *= hv.Text(xmid, ylim[-1] / 2,
                             'Data N/A', fontsize=18)
 
-        try:
-            var_climo = df_sel.iloc[0][f'Climo {var}']
-            var_vline = hv.VLine(var_climo)
-            plot *= var_vline
-        except KeyError:
-            pass
+        var_climo = hists['climo'][col_ind]
+        if not np.isnan(var_climo):
+            plot *= hv.VLine(var_climo)
 
         return plot.opts(title='', tools=['hover'], toolbar='below')
 
-    def generate_tooltip(self, row, stat, rec=None, prev_rec=None):
-        var = getattr(row, f'idx{stat}')()
-
-        try:
-            val = row[var]
-        except:
-            return ''
-
-        field, units = self.parse_field_units(var, lower=True)
-        if rec is None:
-            tooltip = f'The {field} was {val:.2f}{units}.'
-        else:
-            tooltip = (f'The {field} ranks #{rec} '
-                       f'at {val:.2f}{units}.')
-
-            if rec == 1:
-                prev_rec_diff = val - prev_rec[1]
-                tooltip += (
-                    f' The previous record was '
-                    f' in {prev_rec[0]:%Y} at'
-                    f' {prev_rec[1]:.2f}{units}!'
-                )
-        return tooltip
-
     def create_hover_text(self, color, label, tooltip):
         if not tooltip:
             return
@@ -237,248 +148,235 @@ class WeatherFlash():
                 pn.Row(hover_text, sizing_mode='stretch_width', align='center')
             )
 
-    def create_records_highlights(self, row_sel, row_rec, num_days, prev_recs):
-        color = label = tooltip = None
-        row_top = row_rec.loc[row_rec <= 3]
-        color = C.CLRS['yellow']
-
-        for var in row_top.index:
-            if var not in DF_COLS_TOP:
-                continue
-            field, units = self.parse_field_units(var)
-            rec = int(row_top[var])
-            prev_rec = prev_recs[var] if var in prev_recs else None
-            label = f'#{rec} {field}' if rec > 1 else f'Record {field}'
-            row_sub = row_sel[[var]]
-            tooltip = self.generate_tooltip(
-                row_sub, 'max', rec=rec, prev_rec=prev_rec)
-            self.create_hover_text(color, label, tooltip)
-
-        row_bot = row_rec.loc[row_rec >= num_days - 3]
-        for var in row_bot.index:
-            if var not in DF_COLS_BOT:
-                continue
-            field, units = self.parse_field_units(var)
-            rec = int(num_days - row_bot[var] + 1)
-            prev_rec = prev_recs[var] if var in prev_recs else None
-            label = f'#{rec} {field}' if rec > 1 else f'Record {field}'
-            row_sub = row_sel[[var]]
-            tooltip = self.generate_tooltip(
-                row_sub, 'min', rec=rec, prev_rec=prev_rec)
-            self.create_hover_text(color, label, tooltip)
-
-    def create_highs_highlights(self, row_sel):
-        color = label = tooltip = None
-        row_tmp = row_sel[DF_COLS_TMP]
-        row_max = row_tmp.max()
-        if row_max > 100:
-            color = '#984b44'
-            label = 'Scorching'
-            tooltip = self.generate_tooltip(row_tmp, 'max')
-        elif row_max > 90:
-            color = '#b05b5a'
-            label = 'Hot'
-            tooltip = self.generate_tooltip(row_tmp, 'max')
-        elif row_max > 75:
-            color = '#c77560'
-            label = 'Warm'
-            tooltip = self.generate_tooltip(row_tmp, 'max')
-        elif row_max > 60:
-            color = '#e9cc77'
-            label = 'Comfortable'
-            tooltip = self.generate_tooltip(row_tmp, 'max')
-        self.create_hover_text(color, label, tooltip)
-
-    def create_lows_highlights(self, row_sel):
-        color = label = tooltip = None
-        row_tmp = row_sel[DF_COLS_TMP]
-        row_min = row_tmp.min()
-        if row_min <= 32:
-            color = '#5ca0b4'
-            label = 'Freezing'
-            tooltip = self.generate_tooltip(row_tmp, 'min')
-        elif row_min < 45:
-            color = '#83c2d5'
-            label = 'Cold'
-            tooltip = self.generate_tooltip(row_tmp, 'min')
-        elif row_min < 60:
-            color = '#8dbf71'
-            label = 'Cool'
-            tooltip = self.generate_tooltip(row_tmp, 'min')
-        self.create_hover_text(color, label, tooltip)
-
-    def create_pcp_highlights(self, row_sel):
-        color = label = tooltip = None
-        row_pcp = row_sel[DF_COLS_PCP]
-        row_max = row_pcp.max()
-
-        if row_max > 1.5:
-            color = C.CLRS['green_blue']
-            label = 'Significant Precip'
-            tooltip = self.generate_tooltip(row_pcp, 'max')
-        elif row_max > 0.5:
-            color = C.CLRS['sea_blue']
-            label = 'Precip'
-            tooltip = self.generate_tooltip(row_pcp, 'max')
-        elif row_max > 0.01:
-            color = C.CLRS['sky_blue']
-            label = 'Light Precip'
-            tooltip = self.generate_tooltip(row_pcp, 'max')
-        elif row_max > 0:
-            color = C.CLRS['fresh_blue']
-            label = 'Trace Precip'
-            tooltip = self.generate_tooltip(row_pcp, 'max')
-        elif row_max == 0:
-            color = C.CLRS['dark_brown']
-            label = 'No Precip'
-            tooltip = self.generate_tooltip(row_pcp, 'max')
-        self.create_hover_text(color, label, tooltip)
-
-    def create_wnd_highlights(self, row_sel):
-        color = label = tooltip = None
-        row_wnd = row_sel[DF_COLS_WND]
-        row_max = row_wnd.max()
-        if row_max > 74:
-            color = '#5e1d47'
-            label = 'Destructive Winds'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        elif row_max > 56:
-            color = '#663c60'
-            label = 'Violent Winds'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        elif row_max > 34:
-            color = '#966289'
-            label = 'Heavy Winds'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        elif row_max > 20:
-            color = '#e196d1'
-            label = 'Windy'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        elif row_max > 8:
-            color = '#5d535'
-            label = 'Breezy'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        elif row_max > 0:
-            color = '#cccccc'
-            label = 'Light Breeze'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        elif row_max == 0:
-            color = '#eeeeee'
-            label = 'Calm'
-            tooltip = self.generate_tooltip(row_wnd, 'max')
-        self.create_hover_text(color, label, tooltip)
-
-    def create_highlights(self, label, df_sel):
+    def create_highlights(self, label):
         if 'Past Years' in label:
-            df_rec = df_sel[:self.datetime].rank(
-                method='max', numeric_only=True,
-                na_option='bottom', ascending=False)
-            num_days = len(df_rec)
-
-            prev_recs = {}
-            for var in df_rec.columns:
-                if var in DF_COLS_TOP:
-                    second_rank = 2
-                elif var in DF_COLS_BOT:
-                    second_rank = num_days - 1
-                else:
-                    continue
-                try:
-                    prev_rec_idx = df_rec[var] == second_rank
-                    prev_rec_dt = (
-                        df_rec.loc[prev_rec_idx, var]
-                        .index[-1])
-                    prev_rec_val = (
-                        df_sel.loc[prev_rec_dt, var]
-                    )
-                    prev_recs[var] = (prev_rec_dt, prev_rec_val)
-                except IndexError:
-                    pass
-
-            row_sel = df_sel.loc[self.datetime]
-            row_rec = df_rec.loc[self.datetime]
-            self.create_highs_highlights(row_sel)
-            self.create_lows_highlights(row_sel)
-            self.create_pcp_highlights(row_sel)
-            self.create_wnd_highlights(row_sel)
-
-            if len(df_rec) > 3:
-                self.create_records_highlights(
-                    row_sel, row_rec, num_days, prev_recs)
-
-    def create_content(self):
-        mday = str(self.datetime)[5:10]
-        df_sub = self.df[:self.datetime]
-        df_sels = [df_sub.loc[df_sub.index.strftime('%m-%d') == mday]]
-        for days in [365, 90, 30, 14]:
-            df_sels.append(df_sub.loc[
-                df_sub.index >= self.datetime - pd.Timedelta(days=days)
-            ])
-
-        labels = ['Past Years', 'Past 365 Days', 'Past 90 Days',
-                  'Past 30 Days', 'Past 14 Days']
-        tab_items = []
+            for highlight in self.history.highlights(self.datetime):
+                self.create_hover_text(
+                    highlight.color, highlight.label, highlight.tooltip)
+
+    def select_days(self, label):
+        # row positions into the shared data; trailing windows are slices
+        days = WINDOWS[label]
+        calendar = self.history.data.calendar
+        if days is None:
+            return calendar.same_day(self.datetime)
+        return calendar.window(self.datetime, days)
+
+    def create_plots(self, label):
+        history = self.history
+        rows = self.select_days(label)
+        index = history.data.index[rows]
+        if 'Year' not in label:
+            time_label = index.min()
+            weather_label = (
+                f'Histograms from {time_label:%B %d, %Y} to '
+                f'{self.datetime:%B %d, %Y}')
+        else:
+            time_label = history.meta.begints[:4]
+            weather_label = (
+                f'Histograms on {self.datetime:%B %d}s '
+                f'from {time_label} to {self.datetime.year}')
+
+        # rows end on the selected date unless it has no data
+        sel = -1 if len(index) and index[-1] == self.datetime else None
+        hists = histograms(
+            history.data.decode(rows, history.plot_vars), sel=sel)
+        # the dashed line is IEM's climo_* normal listed on the first
+        # selected day, for the variables that have one
+        hists['climo'] = np.full(len(history.plot_vars), np.nan)
+        if len(index):
+            row = history.data.row(index[0])
+            for col_ind, var in enumerate(history.plot_vars):
+                hists['climo'][col_ind] = row.get(f'Climo {var}', np.nan)
+        return hv.Layout([
+            self.create_hist(hists, col_ind, var)
+            for col_ind, var in enumerate(history.plot_vars)
+        ]).cols(4).relabel(
+            f'{history.meta.name.title()} ({history.meta.stid}) '
+            f'{weather_label}'
+        ).opts(toolbar=None, transpose=True)
+
+    def tab_key(self, index):
+        # keyed by the loaded station, which lags the input while loading,
+        # and by when it was loaded so a reloaded history is redrawn
+        return (self.history.meta.stid, self.history.loaded, self.datetime,
+                list(WINDOWS)[index])
+
+    def render_tab(self, index, plots=None):
+        key = self.tab_key(index)
+        if plots is None:
+            plots = TAB_CACHE.get(key)
+        if plots is None:
+            plots = self.create_plots(key[-1])
+        TAB_CACHE.put(key, plots)
+        self.tabs[index].object = plots
+
+    async def prefetch_tab(self, token):
+        # one tab per tick so widget events can interleave; stop as soon
+        # as a newer station or date is selected
+        if token != self._token:
+            return
+        for index, pane in enumerate(self.tabs):
+            if pane.object is not None:
+                continue
+            plots = TAB_CACHE.get(self.tab_key(index))
+            if plots is None:
+                plots = await run_in_executor(
+                    self.create_plots, list(WINDOWS)[index])
+                if token != self._token:
+                    return
+            self.render_tab(index, plots)
+            self._doc.add_next_tick_callback(
+                partial(self.prefetch_tab, token))
+            return
+
+    def create_content(self, plots=None):
         self.highlights.objects = [
             pn.Row(sizing_mode='stretch_width', align='center')
         ]
-        for label, df_sel in zip(labels, df_sels):
-            self.create_highlights(label, df_sel)
-
-            if 'Year' not in label:
-                time_label = df_sel.index.min()
-                weather_label = (
-                    f'Histograms from {time_label:%B %d, %Y} to '
-                    f'{self.datetime:%B %d, %Y}')
+        label = list(WINDOWS)[0]
+        self.create_highlights(label)
+
+        # only the visible tab is computed now, the others when opened
+        for index, pane in enumerate(self.tabs):
+            if index == self.tabs.active:
+                self.render_tab(index, plots)
             else:
-                time_label = self.ts[:4]
-                weather_label = (
-                    f'Histograms on {self.datetime:%B %d}s '
-                    f'from {time_label} to {self.datetime.year}')
-            plots = hv.Layout([
-                self.create_hist(df_sel, var)
-                for var in df_sub.columns[:-1]
-                if not var.startswith('Climo')
-            ]).cols(4).relabel(
-                f'{self.name.title()} ({self.station_input.value}) '
-                f'{weather_label}'
-            ).opts(toolbar=None, transpose=True)
-            tab_items.append((
-                label, pn.pane.HoloViews(
-                    plots, linked_axes=False, min_width=750, min_height=1200)
-                )
-            )
-        self.tabs[:] = tab_items
+                pane.object = None
 
-    def update_station_input(self, event):
+        self._doc = pn.state.curdoc
+        if self.prefetch_tabs and self._doc is not None:
+            self._doc.add_next_tick_callback(
+                partial(self.prefetch_tab, self._token))
+
+    def update_tab(self, event):
+        if self.tabs[event.new].object is not None:
+            return
         self.progress.active = True
         try:
             self.progress.bar_color = 'warning'
-            self.read_data(event.new)
-            self.create_content()
+            self.render_tab(event.new)
             self.progress.bar_color = 'secondary'
         except Exception as e:
             self.progress.bar_color = 'danger'
+            self.status.object = f'Failed to render tab: {e}'
+            logger.exception('Failed to render tab %s', event.new)
         self.progress.active = False
 
-    def update_date_input(self, event):
-        self.progress.active = True
-        try:
-            self.progress.bar_color = 'warning'
-            self.datetime = pd.to_datetime(event.new)
-            self.create_content()
+    def update_job(self, station=None, date=None):
+        # the stages of an update as (stage, func, args) steps that the
+        # runner may move off the event loop; everything between the
+        # steps touches the session's state and widgets
+        if station is not None:
+            self.history = yield 'load', HISTORIES.get, (station,)
+            self._pending_station = None
+        if date is not None:
+            self.datetime = pd.to_datetime(date)
+
+        index = self.tabs.active
+        plots = TAB_CACHE.get(self.tab_key(index))
+        if plots is None:
+            plots = yield 'render', self.create_plots, (list(WINDOWS)[index],)
+        self.create_content(plots)
+
+    def report(self, timings, error=None):
+        steps = ', '.join(f'{stage} {elapsed:.2f}s'
+                          for stage, elapsed in timings.items())
+        if error is None:
             self.progress.bar_color = 'secondary'
-        except Exception as e:
+            self.status.object = f'<center>{steps}</center>'
+        else:
             self.progress.bar_color = 'danger'
+            self.status.object = (
+                f'<center>{type(error).__name__}: {html.escape(str(error))}'
+                f'{" after " + steps if steps else ""}</center>')
         self.progress.active = False
 
+    def run_job(self, job):
+        timings = OrderedDict()
+        start = time.perf_counter()
+        result = None
+        try:
+            while True:
+                stage, func, args = job.send(result)
+                stage_start = time.perf_counter()
+                result = func(*args)
+                timings[stage] = time.perf_counter() - stage_start
+        except StopIteration:
+            timings['total'] = time.perf_counter() - start
+            self.report(timings)
+        except Exception as e:
+            logger.exception('WeatherFlash update failed')
+            self.report(timings, e)
+
+    async def _run_job(self, job, token):
+        if token != self._token:
+            return
+
+        timings = OrderedDict()
+        start = time.perf_counter()
+        result = None
+        try:
+            while True:
+                stage, func, args = job.send(result)
+                self.status.object = f'<center>Running {stage}...</center>'
+                stage_start = time.perf_counter()
+                self._future = future = run_in_executor(func, *args)
+                try:
+                    result = await future
+                finally:
+                    if self._future is future:
+                        self._future = None
+                timings[stage] = time.perf_counter() - stage_start
+                # a newer station or date superseded this job while it ran
+                if token != self._token:
+                    job.close()
+                    return
+        except StopIteration:
+            timings['total'] = time.perf_counter() - start
+            self.report(timings)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            if token != self._token:
+                return
+            logger.exception('WeatherFlash update failed')
+            self.report(timings, e)
+
+    def submit(self, station=None, date=None):
+        # a station whose load is still pending, or failed, carries over
+        # into the job that replaces it, so a date edit made meanwhile
+        # does not render the previous station's data
+        if station is None:
+            station = self._pending_station
+        self._pending_station = station
+        self._token += 1
+        if self._future is not None:
+            self._future.cancel()
+
+        self.progress.active = True
+        self.progress.bar_color = 'warning'
+        job = self.update_job(station=station, date=date)
+        doc = pn.state.curdoc
+        if not self.offload or doc is None:
+            self.run_job(job)
+            return
+        doc.add_next_tick_callback(partial(self._run_job, job, self._token))
+
+    def update_station_input(self, event):
+        self.submit(station=event.new)
+
+    def update_date_input(self, event):
+        self.submit(date=event.new)
+
     def view(self):
         self.station_input = pn.widgets.AutocompleteInput(
-            name='ASOS Station ID', options=self.stations, align='center',
-            value='CMI', width=300)
+            name='ASOS Station ID', options=STATIONS.ids,
+            case_sensitive=False, align='center', value='CMI', width=300)
         self.station_input.param.watch(self.update_station_input, 'value')
 
         self.read_data(self.station_input.value)
-        self.datetime = self.df.index.max()
+        self.datetime = self.history.data.index.max()
 
         self.date_input = pn.widgets.DatePicker(
             name='Date Selector', align='center',
@@ -487,7 +385,10 @@ class WeatherFlash():
 
         self.progress = pn.widgets.Progress(
             active=False, bar_color='secondary', width=300,
-            margin=(-15, 10, 25, 10), align='center')
+            margin=(-15, 10, 0, 10), align='center')
+        self.status = pn.pane.HTML(
+            '', width=300, margin=(0, 10, 15, 10), align='center',
+            styles={'font-size': '11px', 'color': C.CLRS['gray']})
 
         title = pn.pane.Markdown(
             f'<center><h1>Weather<span style='
@@ -502,15 +403,19 @@ class WeatherFlash():
             align='center')
 
         left_col = pn.Column(
-            title, self.progress,
+            title, self.progress, self.status,
             self.station_input, self.date_input, pn.layout.Divider(),
             subtitle, pn.layout.Divider(), self.highlights,
             sizing_mode='stretch_height')
 
-        self.tabs = pn.Tabs(
-            sizing_mode='stretch_both', margin=(10, 35),
+        self.tabs = pn.Tabs(*[
+            (label, pn.pane.HoloViews(
+                None, linked_axes=False, min_width=750, min_height=1200))
+            for label in WINDOWS
+        ], sizing_mode='stretch_both', margin=(10, 35),
             tabs_location='right', dynamic=True
         )
+        self.tabs.param.watch(self.update_tab, 'active')
         self.create_content()
 
         layout = pn.Row(
@@ -0,0 +1,342 @@
+import time
+import weakref
+import operator
+import warnings
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import constant as C
+from asos import STATION_CACHE, STATIONS
+from weatherstats import RecordIndex, StationData
+
+DF_COLS_POSITIVE = ['Precip In', 'Snow In']
+DF_COLS_RENAMES = {
+    'Climo High F': 'Climo Max Temp F',
+    'Climo Low F': 'Climo Min Temp F',
+    'Min Feel': 'Min Feel F',
+    'Max Feel': 'Max Feel F',
+    'Max Wind Speed Kts': 'Max Wind Kts',
+    'Max Wind Gust Kts': 'Max Gust Kts'
+}
+DF_COLS_TMP = ['Min Temp F', 'Max Temp F', 'Min Feel F', 'Max Feel F']
+DF_COLS_PCP = ['Precip In']
+DF_COLS_WND = ['Max Wind Kts', 'Max Gust Kts']
+DF_COLS_TOP = ['Max Temp F', 'Max Feel F',
+               'Precip In', 'Snow In',
+               'Max Wind Kts', 'Max Gust Kts']
+DF_COLS_BOT = ['Min Temp F', 'Min Feel F']
+
+# (columns, statistic, [(comparison, threshold, color, label), ...]); the
+# first matching row of each table labels the day
+HIGHLIGHTS = {
+    'highs': (DF_COLS_TMP, 'max', [
+        (operator.gt, 100, '#984b44', 'Scorching'),
+        (operator.gt, 90, '#b05b5a', 'Hot'),
+        (operator.gt, 75, '#c77560', 'Warm'),
+        (operator.gt, 60, '#e9cc77', 'Comfortable'),
+    ]),
+    'lows': (DF_COLS_TMP, 'min', [
+        (operator.le, 32, '#5ca0b4', 'Freezing'),
+        (operator.lt, 45, '#83c2d5', 'Cold'),
+        (operator.lt, 60, '#8dbf71', 'Cool'),
+    ]),
+    'pcp': (DF_COLS_PCP, 'max', [
+        (operator.gt, 1.5, C.CLRS['green_blue'], 'Significant Precip'),
+        (operator.gt, 0.5, C.CLRS['sea_blue'], 'Precip'),
+        (operator.gt, 0.01, C.CLRS['sky_blue'], 'Light Precip'),
+        (operator.gt, 0, C.CLRS['fresh_blue'], 'Trace Precip'),
+        (operator.eq, 0, C.CLRS['dark_brown'], 'No Precip'),
+    ]),
+    'wnd': (DF_COLS_WND, 'max', [
+        (operator.gt, 74, '#5e1d47', 'Destructive Winds'),
+        (operator.gt, 56, '#663c60', 'Violent Winds'),
+        (operator.gt, 34, '#966289', 'Heavy Winds'),
+        (operator.gt, 20, '#e196d1', 'Windy'),
+        (operator.gt, 8, '#5d535', 'Breezy'),
+        (operator.gt, 0, '#cccccc', 'Light Breeze'),
+        (operator.eq, 0, '#eeeeee', 'Calm'),
+    ]),
+}
+RECORD_COLOR = C.CLRS['yellow']
+# trailing days summarized in a labeled day's tooltip
+RECENT_DAYS = 90
+
+Highlight = namedtuple(
+    'Highlight', ['kind', 'label', 'color', 'tooltip', 'var', 'value', 'rank'])
+
+
+def parse_field_units(var, lower=False):
+    split = var.split()
+    units = split.pop(-1)
+    units = units.upper() if len(units) == 1 else f' {units.lower()}'
+    field = ' '.join(split).lower() if lower else ' '.join(split)
+    return field, units
+
+
+def prepare_frame(df):
+    df['day_of_year'] = df.index.dayofyear
+    df.columns = df.columns.str.replace('_', ' ').str.title()
+    df = df.rename(columns=DF_COLS_RENAMES)
+    for col in DF_COLS_POSITIVE:
+        df.loc[df[col] < 0, col] = np.nan
+    return df.dropna(subset=[df.columns[0]])
+
+
+def extreme(row, stat):
+    # the column holding row's max or min, None if they are all missing
+    values = row.values.astype(np.float64)
+    if np.isnan(values).all():
+        return None, np.nan
+    i = np.nanargmax(values) if stat == 'max' else np.nanargmin(values)
+    return row.index[i], values[i]
+
+
+def generate_tooltip(var, val, rec=None, prev_rec=None):
+    field, units = parse_field_units(var, lower=True)
+    if rec is None:
+        return f'The {field} was {val:.2f}{units}.'
+
+    tooltip = (f'The {field} ranks #{rec} '
+               f'at {val:.2f}{units}.')
+    if rec == 1 and prev_rec is not None:
+        tooltip += (
+            f' The previous record was '
+            f' in {prev_rec[0]:%Y} at'
+            f' {prev_rec[1]:.2f}{units}!'
+        )
+    return tooltip
+
+
+def categorize(kind, values):
+    # position of the first matching row of kind's table for each value,
+    # -1 where none does, including NaNs
+    _, _, table = HIGHLIGHTS[kind]
+    values = np.asarray(values, dtype=np.float64)
+    return np.select([compare(values, threshold)
+                      for compare, threshold, _, _ in table],
+                     np.arange(len(table)), -1)
+
+
+def classify(kind, row_sel, code=None):
+    columns, stat, table = HIGHLIGHTS[kind]
+    var, val = extreme(row_sel[columns], stat)
+    if code is None:
+        code = int(categorize(kind, val))
+    if code < 0:
+        return None
+    _, _, color, label = table[code]
+    return Highlight(kind, label, color, generate_tooltip(var, val),
+                     var, val, None)
+
+
+class DayCategories(object):
+    """
+    The row of each HIGHLIGHTS table matching every day of a StationData,
+    as int8 codes (-1 where none matches) computed for the whole history
+    at once, so counting or finding days by label is an array reduction.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.codes = {}
+        for kind, (columns, stat, _) in HIGHLIGHTS.items():
+            values = data.decode(columns=columns)
+            with warnings.catch_warnings():
+                # days missing every column have no extreme
+                warnings.simplefilter('ignore', RuntimeWarning)
+                extremes = (np.nanmax(values, axis=1) if stat == 'max' else
+                            np.nanmin(values, axis=1))
+            codes = categorize(kind, extremes).astype(np.int8)
+            codes.flags.writeable = False
+            self.codes[kind] = codes
+
+    @staticmethod
+    def code(kind, label):
+        labels = [row[-1] for row in HIGHLIGHTS[kind][2]]
+        return labels.index(label)
+
+    def on(self, kind, day):
+        return int(self.codes[kind][self.data.index.get_loc(day)])
+
+    def recent(self, kind, day, days):
+        # codes of exactly that many days ending on day; calendar windows
+        # are one day longer, like df[day - days:day]
+        return self.codes[kind][self.data.calendar.window(day, days - 1)]
+
+    def count(self, kind, label, day, days):
+        # recent days labeled label
+        codes = self.recent(kind, day, days)
+        return int(np.count_nonzero(codes == self.code(kind, label)))
+
+    def counts(self, kind, day, days):
+        codes = self.recent(kind, day, days)
+        labels = [row[-1] for row in HIGHLIGHTS[kind][2]]
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        return dict(zip(labels, counts.tolist()))
+
+    def last(self, kind, label, day):
+        # the latest day labeled label on or before day, None if none was
+        codes = self.codes[kind][:self.data.calendar.stop(day)]
+        rows = np.flatnonzero(codes == self.code(kind, label))
+        return self.data.index[rows[-1]] if len(rows) else None
+
+    def nbytes(self):
+        return sum(codes.nbytes for codes in self.codes.values())
+
+
+def record_highlights(row_sel, row_rec, num_days, prev_recs):
+    highlights = []
+    ranks = [(var, int(rank)) for var, rank in row_rec.items()
+             if var in DF_COLS_TOP and rank <= 3]
+    ranks += [(var, int(num_days - rank + 1)) for var, rank in row_rec.items()
+              if var in DF_COLS_BOT and rank >= num_days - 3]
+    for var, rec in ranks:
+        val = row_sel[var]
+        # a missing value ties at the bottom, which is no record
+        if np.isnan(val):
+            continue
+        field, units = parse_field_units(var)
+        label = f'#{rec} {field}' if rec > 1 else f'Record {field}'
+        tooltip = generate_tooltip(
+            var, val, rec=rec, prev_rec=prev_recs.get(var))
+        highlights.append(Highlight(
+            'records', label, RECORD_COLOR, tooltip, var, val, rec))
+    return highlights
+
+
+def recent_tooltip(categories, kind, label, day):
+    count = categories.count(kind, label, day, RECENT_DAYS)
+    prev = categories.last(kind, label, day - pd.Timedelta(days=1))
+    tooltip = f' {label} on {count} of the last {RECENT_DAYS} days'
+    if prev is not None:
+        tooltip += f', before this on {prev:%B %d, %Y}'
+    return tooltip + '.'
+
+
+def compute_highlights(row_sel, record_index, day, categories=None):
+    """
+    Notable weather on day, whose values are row_sel: one label per
+    HIGHLIGHTS table that matches, then the top or bottom three ranked
+    values among the same calendar day in past years. With the station's
+    DayCategories, labels come from its codes and their tooltips add how
+    often the label occurred recently.
+    """
+    highlights = []
+    for kind in HIGHLIGHTS:
+        code = None if categories is None else categories.on(kind, day)
+        highlight = classify(kind, row_sel, code)
+        if highlight is None:
+            continue
+        if categories is not None:
+            highlight = highlight._replace(
+                tooltip=highlight.tooltip + recent_tooltip(
+                    categories, kind, highlight.label, day))
+        highlights.append(highlight)
+
+    row_rec, num_days, prev_recs = record_index.records(
+        day, DF_COLS_TOP, DF_COLS_BOT)
+    if num_days > 3:
+        highlights += record_highlights(row_sel, row_rec, num_days, prev_recs)
+    return highlights
+
+
+class StationHistory(object):
+    """
+    Everything derived from one station's cached history that sessions
+    only read: the compact StationData, its record index, its days'
+    HIGHLIGHTS categories.
+    """
+
+    def __init__(self, meta, df):
+        self.meta = meta
+        self.data = StationData(prepare_frame(df))
+        self.plot_vars = [var for var in self.data.columns[:-1]
+                          if not var.startswith('Climo')]
+        self.record_index = RecordIndex(self.data, DF_COLS_TOP + DF_COLS_BOT)
+        self.categories = DayCategories(self.data)
+        self.loaded = time.time()
+
+    def highlights(self, day):
+        # gap days and days past the last row have nothing to highlight
+        if day not in self.data.index:
+            return []
+        return compute_highlights(self.data.row(day), self.record_index, day,
+                                  self.categories)
+
+    def nbytes(self):
+        return self.data.nbytes() + self.categories.nbytes()
+
+
+class HistoryStore(object):
+    """
+    Process-wide StationHistory per station, shared by the sessions
+    showing it and dropped once none does; a history older than the
+    station cache's TTL is reloaded, refreshing the cache, on next use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histories = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._histories)
+
+    def nbytes(self):
+        return sum(history.nbytes()
+                   for history in list(self._histories.values()))
+
+    @staticmethod
+    def fresh(history):
+        return time.time() - history.loaded <= STATION_CACHE.ttl
+
+    def get(self, station):
+        meta = STATIONS.get(station)
+        if meta is None:
+            matches = ', '.join(STATIONS.search(station[:2], limit=5))
+            raise ValueError(f'unknown ASOS station {station}' +
+                             (f', did you mean {matches}?' if matches else ''))
+        key = (meta.stid, meta.network)
+        history = self._histories.get(key)
+        if history is not None and self.fresh(history):
+            return history
+
+        # loaded outside the lock so one slow station does not hold up
+        # the others; if two sessions race, the first one stored wins
+        history = StationHistory(
+            meta, STATION_CACHE.get(meta.stid, meta.network))
+        with self._lock:
+            current = self._histories.get(key)
+            if current is not None and self.fresh(current):
+                return current
+            self._histories[key] = history
+        return history
+
+
+def station_highlights(station, day=None):
+    """
+    Returns the day reported, by default the station's last cached day,
+    and its highlights; nothing is downloaded, so a station without a
+    cached history or without data on day has no highlights.
+    """
+    meta = STATIONS.get(station)
+    if meta is None:
+        return day, []
+    df, _ = STATION_CACHE.load(meta.stid, meta.network)
+    if df is None or len(df) == 0:
+        return day, []
+    df = prepare_frame(df)
+    if len(df) == 0:
+        return day, []
+    day = df.index.max() if day is None else day
+    if day not in df.index:
+        return day, []
+    data = StationData(df)
+    record_index = RecordIndex(data, DF_COLS_TOP + DF_COLS_BOT)
+    return day, compute_highlights(data.row(day), record_index, day,
+                                   DayCategories(data))
+
+
+HISTORIES = HistoryStore()
@@ -0,0 +1,249 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class CalendarIndex(object):
+    """
+    Positional index over a station's sorted daily history.
+
+    Rows are grouped by an integer month * 100 + day key, each group kept
+    in chronological order, so the same calendar day in past years is a
+    binary search plus a slice of row positions; trailing windows are
+    two binary searches on the dates themselves.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        key = (index.month * 100 + index.day).values.astype(np.int16)
+        self.order = np.argsort(key, kind='stable')
+        self.keys, offsets = np.unique(key[self.order], return_index=True)
+        self.offsets = np.append(offsets, len(key))
+
+    def stop(self, day):
+        return self.index.searchsorted(day, side='right')
+
+    def group(self, day):
+        # bounds in self.order of day's month and day in every year up to day
+        key = day.month * 100 + day.day
+        i = self.keys.searchsorted(key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return 0, 0
+        start = self.offsets[i]
+        rows = self.order[start:self.offsets[i + 1]]
+        return start, start + rows.searchsorted(self.stop(day))
+
+    def same_day(self, day):
+        return self.order[slice(*self.group(day))]
+
+    def window(self, day, days):
+        # the days up to and including day, like df[day - days:day]
+        start = self.index.searchsorted(day - pd.Timedelta(days=days))
+        return slice(start, self.stop(day))
+
+
+class StationData(object):
+    """
+    A station's daily history as one read-only row x column matrix with
+    its date index and CalendarIndex, meant to be shared by every session
+    looking at the station.
+
+    Values are stored as float32 when that round trips every value at
+    `decimals` places, which IEM's rounded observations do, and as float64
+    otherwise; row slices are views and decode returns the original
+    float64 values of a selection.
+    """
+
+    decimals = 4
+
+    def __init__(self, df):
+        self.index = df.index
+        self.columns = list(df.columns)
+        values = df.values.astype(np.float64)
+        compact = values.astype(np.float32)
+        if np.array_equal(np.round(compact.astype(np.float64), self.decimals),
+                          values, equal_nan=True):
+            values = compact
+        values.flags.writeable = False
+        self.values = values
+        self.calendar = CalendarIndex(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def positions(self, columns):
+        return [self.columns.index(column) for column in columns]
+
+    def decode(self, rows=slice(None), columns=None):
+        values = self.values[rows]
+        if columns is not None:
+            values = values[:, self.positions(columns)]
+        if values.dtype == np.float64:
+            return values
+        return np.round(values.astype(np.float64), self.decimals)
+
+    def row(self, day):
+        return pd.Series(self.decode(self.index.get_loc(day)),
+                         index=self.columns, name=day)
+
+    def nbytes(self):
+        calendar = self.calendar
+        return (self.values.nbytes + self.index.nbytes +
+                calendar.order.nbytes + calendar.keys.nbytes +
+                calendar.offsets.nbytes)
+
+
+class RecordIndex(object):
+    """
+    Per calendar day order statistics for the record highlights.
+
+    A calendar day's history up to any date is a contiguous block of the
+    data's CalendarIndex order, oldest year first, gathered from the
+    shared StationData when a day is ranked. Ranks match
+    DataFrame.rank(method='max', na_option='bottom', ascending=False)
+    over that block, including ties and NaNs, and come from binary
+    searches in the block's sorted values.
+    """
+
+    def __init__(self, data, columns):
+        self.data = data
+        self.calendar = data.calendar
+        self.columns = [column for column in data.columns
+                        if column in columns]
+
+    def block(self, start, stop):
+        return self.data.decode(self.calendar.order[start:stop], self.columns)
+
+    @staticmethod
+    def ranks(block):
+        # NaNs tie at the bottom, which the max method ranks as the last row
+        ranks = np.full(block.shape, len(block), dtype=np.int64)
+        for j in range(block.shape[1]):
+            values = block[:, j]
+            valid = ~np.isnan(values)
+            ordered = np.sort(values[valid])
+            ranks[valid, j] = len(ordered) - ordered.searchsorted(
+                values[valid], side='left')
+        return ranks
+
+    def records(self, day, top, bottom):
+        """
+        Returns day's rank in each column among the same calendar day in
+        past years, the number of those days, and for each top (bottom)
+        column the date and value of the latest day ranked second from
+        the top (bottom), i.e. the previous record.
+        """
+        start, stop = self.calendar.group(day)
+        num_days = stop - start
+        block = self.block(start, stop)
+        ranks = self.ranks(block)
+        dates = self.calendar.index[self.calendar.order[start:stop]]
+
+        prev_recs = {}
+        for j, column in enumerate(self.columns):
+            if column in top:
+                second_rank = 2
+            elif column in bottom:
+                second_rank = num_days - 1
+            else:
+                continue
+            rows = np.flatnonzero(ranks[:, j] == second_rank)
+            if len(rows):
+                prev_recs[column] = (dates[rows[-1]], block[rows[-1], j])
+        row_rec = pd.Series(ranks[-1] if num_days else np.nan,
+                            index=self.columns)
+        return row_rec, num_days, prev_recs
+
+
+def bin_edges(var_min, var_max):
+    # round the range out to a multiple of a base a digit below the max's
+    # order of magnitude, then use thirds, halves or whole bases as bins;
+    # scalar math on purpose, array powers can differ in the last bit
+    # and change the number of edges
+    if var_max == 0:
+        oom = -1
+    else:
+        oom = np.floor(np.log10(np.abs(var_max))) - 1
+    scale = 10 ** oom
+    if oom > 0:
+        scale = np.log10(scale)
+    base = scale * 5
+
+    var_min = np.floor(var_min / base) * base
+    var_max = np.ceil(var_max / base) * base
+    if var_max < 1:
+        var_max = 1
+
+    num_bins = (var_max - var_min) / base
+    if num_bins <= 7:
+        step = base / 3
+    elif num_bins <= 14:
+        step = base / 2
+    else:
+        step = base
+    edges = np.arange(var_min, var_max + step, step)
+
+    if var_max == var_min:
+        var_max += 0.01
+    return edges, (var_min - base / 3, var_max + base / 3)
+
+
+def histograms(values, sel=None):
+    """
+    Histograms of every column of the 2-D float array `values` in one
+    pass. Columns are paired (0, 1), (2, 3), ... and each pair shares
+    its bins and y range so related fields, e.g. min and max, compare
+    at a glance. Returns plain arrays, one row per column: NaN padded
+    `edges`, zero padded `counts`, `num_bins`, `xlim`, `ymax`, and the
+    `value` of row `sel` with its `selected` bin, -1 where it is NaN or
+    there is no selected row.
+    """
+    num_rows, num_cols = values.shape
+    pairs = values.reshape(num_rows, num_cols // 2, 2)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        var_min = np.nanmin(pairs, axis=(0, 2))
+        var_max = np.nanmax(pairs, axis=(0, 2))
+
+    pair_edges, pair_xlim = zip(*(
+        bin_edges(lo, hi) for lo, hi in zip(var_min, var_max)))
+    num_edges = np.array([len(edges) for edges in pair_edges])
+    edges = np.full((len(pair_edges), num_edges.max()), np.nan)
+    for i, pair_edge in enumerate(pair_edges):
+        edges[i, :len(pair_edge)] = pair_edge
+    edges = np.repeat(edges, 2, axis=0)
+    num_bins = np.repeat(num_edges - 1, 2)
+
+    # bins are half open except the last, which includes its right edge,
+    # the same as np.histogram; NaN values sort past every edge
+    ind = np.empty(values.shape, dtype=np.int64)
+    for j in range(num_cols):
+        ind[:, j] = edges[j, :num_bins[j] + 1].searchsorted(
+            values[:, j], side='right') - 1
+    last = edges[np.arange(num_cols), num_bins]
+    ind = np.where(values == last, num_bins - 1, ind)
+    valid = (ind >= 0) & (ind < num_bins)
+    max_bins = num_bins.max()
+    cols = np.broadcast_to(np.arange(num_cols), ind.shape)
+    counts = np.bincount(
+        (cols * max_bins + ind)[valid], minlength=num_cols * max_bins
+    ).reshape(num_cols, max_bins)
+    ymax = np.repeat(counts.reshape(-1, 2 * max_bins).max(axis=1), 2)
+
+    xlim = np.repeat(np.array(pair_xlim), 2, axis=0)
+    if sel is None:
+        value = np.full(num_cols, np.nan)
+        selected = np.full(num_cols, -1)
+    else:
+        value = values[sel]
+        selected = np.where(valid[sel], ind[sel], -1)
+    return {
+        'edges': edges,
+        'counts': counts,
+        'num_bins': num_bins,
+        'xlim': xlim,
+        'ymax': ymax,
+        'value': value,
+        'selected': selected,
+    }